@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Day-section segmentation under large and hostile inputs: times
+parsers.extract_day_blurb() on multi-megabyte concatenated products and on
+inputs that made the old regex quadratic (long blank runs, lines padded with
+spaces, long word runs), failing when any case exceeds the time budget.
+The results are also checked against the reference regex on random small inputs.
+
+    python benchmarks/day_sections.py --mb 4 --budget-ms 1500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sailing_conditions.parsers import _day_blurb_regex, extract_day_blurb, normalize_heading  # noqa: E402
+
+PRODUCT = """FZUS51 KOKX 151445
+CWFOKX
+
+ANZ338-152100-
+New York Harbor-
+945 AM EDT Fri Aug 15 2025
+
+.REST OF TODAY...SW winds 10 to 15 kt. Waves 1 to 2 ft.
+.TONIGHT...W winds 5 to 10 kt. Waves 1 ft or less.
+.SATURDAY...N winds 10 to 20 kt. Sunny. Waves 2 to 4 ft.
+.SATURDAY NIGHT...N winds 15 kt. Waves 3 ft.
+.SUNDAY...E winds 5 kt. Showers likely. Waves 1 to 2 ft.
+
+$$
+"""
+LABELS = ["TODAY", "REST OF TODAY", "SATURDAY", "MONDAY"]  # MONDAY misses: full scan
+
+
+def hostile_cases(n: int) -> dict:
+    """Each about n chars, with a section at the start and at the very end."""
+    return {
+        "products": PRODUCT * (n // len(PRODUCT)),
+        "blank_lines": ".TODAY...ok\n" + "\n" * n + ".SATURDAY...x\n",
+        "space_padded_line": ".TODAY...ok\nAB" + " " * n + "\n.SATURDAY...x\n",
+        "word_runs": ".TODAY...ok\n" + "AB " * (n // 3) + "\n.SATURDAY...x\n",
+        "short_lines": ".TODAY...ok\n" + "x\n" * (n // 2) + ".SATURDAY...x\n",
+        "night_split": ".TODAY...ok\n" + "A\n NIGHT\n" * (n // 9) + ".SATURDAY...x\n",
+    }
+
+
+def differential(samples: int, seed: int = 0) -> int:
+    rnd = random.Random(seed)
+    atoms = [".", "...", "....", "TODAY", "today", "REST OF TODAY", "SATURDAY", "NIGHT", "night", " ", "\t",
+             "\n", "\n\n", "\x0b", "\xa0", "/", "-", "AB", "x", "ſATURDAY", "winds 10 kt", "$$"]
+    labels = ["TODAY", "REST OF TODAY", "SATURDAY", "SATURDAY NIGHT", "AB"]
+    bad = 0
+    for _ in range(samples):
+        txt = "".join(rnd.choice(atoms) for _ in range(rnd.randrange(1, 40)))
+        lab = rnd.choice(labels)
+        if extract_day_blurb(txt, lab) != _day_blurb_regex(txt, normalize_heading(lab)):
+            bad += 1
+    return bad
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--mb", type=float, default=4.0, help="Input size per case (MB)")
+    ap.add_argument("--budget-ms", type=float, default=1500.0, help="Per case, all labels")
+    ap.add_argument("--samples", type=int, default=20000, help="Differential checks against the regex")
+    args = ap.parse_args(argv)
+
+    failed = False
+    n = int(args.mb * 1_000_000)
+    for name, txt in hostile_cases(n).items():
+        t0 = time.perf_counter()
+        found = sum(extract_day_blurb(txt, lab) is not None for lab in LABELS)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{name:18s} {len(txt) / 1e6:5.1f} MB  {len(LABELS)} labels  {ms:7.1f} ms  ({found} found)")
+        if ms > args.budget_ms:
+            print(f"[fail] {name}: {ms:.0f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+            failed = True
+
+    bad = differential(args.samples)
+    print(f"differential: {args.samples} random inputs, {bad} mismatches with the reference regex")
+    if bad:
+        print(f"[fail] {bad} results differ from the reference regex", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
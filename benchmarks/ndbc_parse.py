@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+NDBC ingestion throughput: parse a synthetic year of 10-minute stdmet data
+for a dozen stations, failing when the best of a few runs exceeds a time
+budget. Rolling stats are timed and reported alongside.
+
+    python benchmarks/ndbc_parse.py --stations 12 --budget-ms 700
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sailing_conditions.ndbc import parse_ndbc_text, station_stats  # noqa: E402
+
+HEADER = (
+    "#YY  MM DD hh mm WDIR WSPD GST  WVHT   DPD   APD MWD   PRES  ATMP  WTMP  DEWP  VIS PTDY  TIDE\n"
+    "#yr  mo dy hr mn degT m/s  m/s     m   sec   sec degT   hPa  degC  degC  degC  nmi  hPa    ft\n"
+)
+
+
+def synthetic_year(seed: int, year: int = 2024) -> str:
+    import calendar
+
+    rnd = random.Random(seed)
+    rows = []
+    t0 = calendar.timegm((year, 1, 1, 0, 0, 0))
+    for i in range(365 * 144):
+        tm = time.gmtime(t0 + i * 600)
+        wspd = "MM" if rnd.random() < 0.02 else f"{rnd.uniform(0, 12):.1f}"
+        gst = "MM" if rnd.random() < 0.05 else f"{rnd.uniform(2, 18):.1f}"
+        rows.append(
+            f"{tm.tm_year} {tm.tm_mon:02d} {tm.tm_mday:02d} {tm.tm_hour:02d} {tm.tm_min:02d} "
+            f"{rnd.randrange(0, 360):3d} {wspd:>4} {gst:>4}    MM    MM    MM  MM 1015.2  24.1  23.0  18.2   MM   MM    MM"
+        )
+    rows.reverse()  # realtime2 order: newest first
+    return HEADER + "\n".join(rows) + "\n"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--stations", type=int, default=12)
+    ap.add_argument("--budget-ms", type=float, default=700.0, help="Well under the 1 s target, with headroom")
+    ap.add_argument("--repeat", type=int, default=3, help="Parse runs; the best one is checked against the budget")
+    args = ap.parse_args(argv)
+
+    texts = [synthetic_year(i) for i in range(args.stations)]
+    runs = []
+    for _ in range(max(1, args.repeat)):
+        parsed = None  # free the previous run's arrays first
+        t0 = time.perf_counter()
+        parsed = [parse_ndbc_text(txt, f"ST{i:03d}") for i, txt in enumerate(texts)]
+        runs.append((time.perf_counter() - t0) * 1000)
+    elapsed_ms = min(runs)
+    rows = sum(len(s["time"]) for s in parsed)
+
+    t1 = time.perf_counter()
+    for series in parsed:
+        station_stats(series, days=365)
+    stats_ms = (time.perf_counter() - t1) * 1000
+
+    print(f"{args.stations} stations, {rows} rows: parse {elapsed_ms:.0f} ms best of {len(runs)} "
+          f"(worst {max(runs):.0f} ms; {rows / (elapsed_ms / 1000):,.0f} rows/s, budget {args.budget_ms:.0f} ms), "
+          f"stats {stats_ms:.0f} ms")
+    if elapsed_ms > args.budget_ms:
+        print(f"[fail] NDBC ingestion took {elapsed_ms:.0f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cold-start import budget for the sailing-conditions CLI.
+
+Runs `python -X importtime -c "import sailing_conditions.cli"` in fresh
+interpreters, takes the median cumulative import time of the CLI module and
+exits non-zero when it exceeds the budget or when a heavy module (requests,
+smtplib, ssl, email.mime, tracemalloc) is imported eagerly. The same is
+checked for a whole main() call that exits early (`--only chicago` out of
+season), which also covers what main() itself imports before returning.
+
+    python benchmarks/startup.py --budget-ms 60 --runs 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+TARGET = "sailing_conditions.cli"
+# Modules that must only load once their pipeline stage runs
+FORBIDDEN = ("requests", "smtplib", "ssl", "email.mime", "tracemalloc")
+
+# Import the CLI and run main() on a January day, when Chicago is out of
+# season and main() returns before any fetch; prints the elapsed ms
+EARLY_EXIT = """
+import time
+t0 = time.perf_counter()
+import datetime
+import sailing_conditions.cli as cli
+
+class Winter(datetime.date):
+    @classmethod
+    def today(cls):
+        return cls(2025, 1, 15)
+
+cli.date = Winter
+assert cli.main(["--only", "chicago"]) == 0
+print(f"{(time.perf_counter() - t0) * 1000:.3f}")
+"""
+
+
+def _import_times(stderr: str) -> dict:
+    """Map module name -> cumulative import time (us) from -X importtime output."""
+    out = {}
+    for ln in stderr.splitlines():
+        if not ln.startswith("import time:") or "|" not in ln:
+            continue
+        _, cumulative, name = ln.split("|", 2)
+        try:
+            out[name.strip()] = int(cumulative.strip())
+        except ValueError:
+            continue  # header row
+    return out
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [repo_root, env.get("PYTHONPATH", "")] if p)
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+
+
+def measure_once(target: str = TARGET) -> dict:
+    return _import_times(_run(f"import {target}").stderr)
+
+
+def measure_early_exit() -> tuple:
+    """(elapsed ms of import + main(), modules loaded) for one out-of-season Chicago run."""
+    proc = _run(EARLY_EXIT)
+    return float(proc.stdout.strip().splitlines()[-1]), set(_import_times(proc.stderr))
+
+
+def _eager(loaded) -> list:
+    return sorted(m for m in loaded if any(m == f or m.startswith(f + ".") for f in FORBIDDEN))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", 60)))
+    ap.add_argument("--runs", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    measure_once()  # warm the bytecode cache so we time imports, not compilation
+    measure_early_exit()
+    samples, loaded = [], set()
+    exit_samples, exit_loaded = [], set()
+    for _ in range(max(1, args.runs)):
+        times = measure_once()
+        samples.append(times.get(TARGET, 0) / 1000.0)
+        loaded.update(times)
+        ms, mods = measure_early_exit()
+        exit_samples.append(ms)
+        exit_loaded.update(mods)
+
+    ok = True
+    for what, series, mods in (("import", samples, loaded), ("out-of-season main()", exit_samples, exit_loaded)):
+        median_ms = statistics.median(series)
+        print(f"{TARGET} {what}: median {median_ms:.1f} ms over {len(series)} runs (budget {args.budget_ms:.0f} ms)")
+        eager = _eager(mods)
+        if eager:
+            print(f"[fail] heavy modules imported by {what}: {', '.join(eager)}", file=sys.stderr)
+            ok = False
+        if median_ms > args.budget_ms:
+            print(f"[fail] {what} took {median_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
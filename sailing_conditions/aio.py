@@ -0,0 +1,325 @@
+"""
+Asyncio-native forecast pipeline for embedding in async services.
+
+    entries = await gather_entries(["nyc", "kc"], ["SATURDAY", "SUNDAY"])
+
+Upstream inputs are fetched without blocking the event loop, using httpx when
+it is installed (pip install "sailing-conditions[async]") and otherwise the
+blocking client in worker threads. The same rate limiter and circuit breakers
+as the synchronous fetchers apply, and there is a per-call concurrency limit.
+Entries come from the same builders (and result store) as
+forecast.iter_entries(), so both paths produce identical records. The
+builders, the product parsers and the TGFTP variant file do blocking work
+(SQLite, disk, CPU), so they run in the loop's default executor. Cancelling
+the awaiting task cancels every request still in flight.
+"""
+import asyncio
+import functools
+import sys
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional
+
+from . import breaker, ratelimit
+from .alerts import alerts_for, city_zones, index_alerts
+from .cities import CITIES
+from .config import ALERTS_ACTIVE, NDBC_REALTIME, NDBC_STATION, NWS_UA, TGFTP_ROOT
+
+DEFAULT_CONCURRENCY = 16
+
+
+class _GridNeeded(Exception):
+    """A marine builder found nothing usable and wants the grid forecast."""
+
+
+def _need_grid():
+    raise _GridNeeded
+
+
+async def _off_loop(fn, *args):
+    """Run a blocking call in the default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+
+def _remembered_variant(rel_path: str) -> str:
+    from .fetchers import _load_variants, _variants_lock
+
+    with _variants_lock:
+        return _load_variants().get(rel_path, "")
+
+
+class _Session:
+    """One HTTP client and concurrency limit shared by the fetches of a gather."""
+
+    def __init__(self, client, max_concurrency: int):
+        self.client = client
+        self.sem = asyncio.Semaphore(max_concurrency)
+        self._fetched: Dict[str, "asyncio.Future"] = {}  # dedupe inputs shared by cities
+
+    async def get(self, url: str, timeout: float = 20):
+        probes = breaker.before_request(url)
+        recorded = False
+        try:
+            await ratelimit.acquire_async(url)
+            async with self.sem:
+                try:
+                    if self.client is not None:  # possibly the caller's: set what NWS expects per request
+                        r = await self.client.get(url, timeout=timeout, headers={"User-Agent": NWS_UA},
+                                                  follow_redirects=True)
+                    else:
+                        import requests
+
+                        call = functools.partial(requests.get, url, timeout=timeout,
+                                                 headers={"User-Agent": NWS_UA}, allow_redirects=True)
+                        r = await asyncio.get_running_loop().run_in_executor(None, call)
+                except Exception:
+                    breaker.record_failure(url)
+                    recorded = True
+                    raise
+            breaker.record_response(url, r.status_code)
+            recorded = True
+        finally:
+            if not recorded:  # cancelled (e.g. the losing hedge): no verdict on the host
+                breaker.release(probes)
+        return r
+
+    def once(self, key: str, make) -> "asyncio.Future":
+        """Run the coroutine from make() once per key for this session; later callers share it."""
+        fut = self._fetched.get(key)
+        if fut is None:
+            fut = self._fetched[key] = asyncio.ensure_future(make())
+        return fut
+
+    async def tgftp_text(self, rel_path: str) -> Optional[str]:
+        """Async twin of fetchers.fetch_tgftp_text: remembered variant first, hedge, first 200 wins."""
+        from .fetchers import HEDGE_DELAY_S, _SKIPPED, _remember_variant
+
+        rel_path = rel_path.lstrip("/")
+        base = f"{TGFTP_ROOT}/{rel_path}".rstrip("/")
+        first = await _off_loop(_remembered_variant, rel_path)
+        pending = [base + first, base + ("/" if first == "" else "")]
+
+        async def one(url):
+            try:
+                r = await self.get(url)
+                return url, (r.text if r.status_code == 200 and r.text.strip() else None)
+            except _SKIPPED:
+                return url, None
+            except Exception as e:
+                print(f"[warn] TGFTP fetch failed {url.replace(TGFTP_ROOT + '/', '')}: {e}", file=sys.stderr)
+                return url, None
+
+        running = {asyncio.ensure_future(one(pending.pop(0)))}
+        try:
+            while running:
+                done, running = await asyncio.wait(running, timeout=HEDGE_DELAY_S if pending else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    url, text = t.result()
+                    if text:
+                        await _off_loop(_remember_variant, rel_path, url[len(base):])
+                        return text
+                if pending:
+                    running.add(asyncio.ensure_future(one(pending.pop(0))))  # hedge, or retry after a miss
+            return None
+        finally:
+            for t in running:
+                t.cancel()  # the losing variant
+
+    async def city_marine_text(self, zones: List[str]) -> Optional[str]:
+        texts = await asyncio.gather(*(self.once("tgftp:" + z, lambda z=z: self.tgftp_text(z)) for z in zones))
+        buf = [f"\n\n===== {z.upper()} =====\n{t.strip()}\n" for z, t in zip(zones, texts) if t]
+        return "\n".join(buf).strip() if buf else None
+
+    async def points(self, lat: float, lon: float) -> Optional[dict]:
+        from .fetchers import _SKIPPED, _points
+
+        key = (round(lat, 4), round(lon, 4))
+        if key in _points:
+            return _points[key]
+        try:
+            r = await self.get(f"https://api.weather.gov/points/{lat},{lon}")
+            r.raise_for_status()
+            props = _points[key] = r.json()["properties"]
+            return props
+        except _SKIPPED:
+            return None
+        except Exception as e:
+            print(f"[warn] Gridpoint fetch failed: {e}", file=sys.stderr)
+            return None
+
+    async def grid_periods(self, lat: float, lon: float) -> Optional[List[dict]]:
+        from .fetchers import _SKIPPED
+
+        props = await self.points(lat, lon)
+        if not props:
+            return None
+        try:
+            f = await self.get(props["forecast"])
+            f.raise_for_status()
+            return f.json()["properties"]["periods"]
+        except _SKIPPED:
+            return None
+        except Exception as e:
+            print(f"[warn] Gridpoint fetch failed: {e}", file=sys.stderr)
+            return None
+
+    async def grid_series(self, lat: float, lon: float) -> Optional[dict]:
+        from .fetchers import _SKIPPED
+        from .gridseries import parse_grid_data
+
+        props = await self.points(lat, lon)
+        if not props:
+            return None
+        try:
+            r = await self.get(props["forecastGridData"])
+            r.raise_for_status()
+            return await _off_loop(parse_grid_data, r.json()["properties"], props.get("timeZone"))
+        except _SKIPPED:
+            return None
+        except Exception as e:
+            print(f"[warn] Grid data fetch failed: {e}", file=sys.stderr)
+            return None
+
+    async def ndbc_series(self, station: str) -> Optional[dict]:
+        from .fetchers import _SKIPPED
+        from .ndbc import parse_ndbc_text
+
+        try:
+            r = await self.get(NDBC_REALTIME.format(station=station), timeout=15)
+            r.raise_for_status()
+            return await _off_loop(parse_ndbc_text, r.text, station)
+        except _SKIPPED:
+            return None
+        except Exception as e:
+            print(f"[warn] NDBC fetch failed: {e}", file=sys.stderr)
+            return None
+
+    async def active_alerts(self, keys: List[str]) -> Dict[str, Optional[List[dict]]]:
+        from .fetchers import _SKIPPED
+
+        pts = await asyncio.gather(*(
+            self.points(CITIES[k]["lat"], CITIES[k]["lon"]) if CITIES[k]["type"] != "marine" else _none()
+            for k in keys
+        ))
+        zones = sorted({z for k, p in zip(keys, pts) for z in city_zones(k, p or {})})
+        if not zones:
+            return {}
+        try:
+            r = await self.get(ALERTS_ACTIVE.format(zones=",".join(zones)), timeout=15)
+            r.raise_for_status()
+            features = r.json().get("features") or []
+        except _SKIPPED:
+            features = None
+        except Exception as e:
+            print(f"[warn] Alerts fetch failed: {e}", file=sys.stderr)
+            features = None
+        return index_alerts(zones, features)
+
+
+async def _none():
+    return None
+
+
+async def _city_entries(s: _Session, key: str, labels: List[str], label_dates: Dict[str, date],
+                        today: date, active: Dict[str, Optional[List[dict]]]) -> List[Dict]:
+    from .fetchers import grid_data_enabled
+    from .forecast import _chicago_cached, _grid_cached, _marine_cached, _pick_present_day_label
+    from .gridseries import wants_series
+
+    meta = CITIES[key]
+    zones = city_zones(key, await s.points(meta["lat"], meta["lon"]) if meta["type"] != "marine" else {})
+    lat, lon = meta["lat"], meta["lon"]
+
+    grid_series = None
+    if grid_data_enabled() and wants_series(key):
+        grid_series = await s.once(f"series:{lat},{lon}", lambda: s.grid_series(lat, lon))
+
+    marine_text = series = None
+    if key == "chicago":
+        from .config import CHICAGO_NEARSHORE
+
+        texts, series = await asyncio.gather(
+            asyncio.gather(*(s.once("tgftp:" + z, lambda z=z: s.tgftp_text(z)) for z in CHICAGO_NEARSHORE)),
+            s.once("ndbc:" + NDBC_STATION, lambda: s.ndbc_series(NDBC_STATION)),
+        )
+        marine_text = "\n\n".join(t for t in texts if t)
+    elif meta["type"] == "marine":
+        marine_text = await s.city_marine_text(meta.get("marine_zones") or [])
+
+    if labels == ["REST OF TODAY", "TODAY"]:
+        use = _pick_present_day_label(marine_text) if meta["type"] == "marine" and marine_text else "TODAY"
+        entry_labels = [use]
+    else:
+        entry_labels = labels
+
+    out = []
+    for lab in entry_labels:
+        day = label_dates.get(lab, today)
+        alerts = alerts_for(active, zones, day)
+        if meta["type"] == "marine":
+            build = _chicago_cached if key == "chicago" else _marine_cached
+            args = (lab, marine_text, series, alerts) if key == "chicago" else (key, lab, marine_text, alerts)
+            try:
+                e = await _off_loop(build, *args, _need_grid, grid_series)
+            except _GridNeeded:
+                periods = await s.once(f"grid:{lat},{lon}", lambda: s.grid_periods(lat, lon))
+                e = await _off_loop(build, *args, lambda periods=periods: periods, grid_series)
+        else:
+            periods = await s.once(f"grid:{lat},{lon}", lambda: s.grid_periods(lat, lon))
+            e = await _off_loop(_grid_cached, key, lab, periods, alerts, grid_series)
+        e["date"] = day.isoformat()
+        out.append(e)
+    return out
+
+
+async def aiter_entries(keys: List[str], labels: List[str], label_dates: Optional[Dict[str, date]] = None,
+                        today: Optional[date] = None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                        client=None) -> AsyncIterator[Dict]:
+    """
+    Yield entries city by city in completion order (see gather_entries). Pass
+    an httpx.AsyncClient to reuse connections across calls.
+    """
+    today = today or date.today()
+    label_dates = label_dates or {}
+    own_client = None
+    if client is None:
+        try:
+            import httpx
+        except ImportError:
+            httpx = None
+        if httpx is not None:
+            client = own_client = httpx.AsyncClient(
+                headers={"User-Agent": NWS_UA}, follow_redirects=True,
+                limits=httpx.Limits(max_connections=max_concurrency),
+            )
+    s = _Session(client, max_concurrency)
+    tasks = []
+    try:
+        active = await s.active_alerts(keys)
+        tasks = [asyncio.ensure_future(_city_entries(s, k, labels, label_dates, today, active)) for k in keys]
+        for fut in asyncio.as_completed(tasks):
+            try:
+                entries = await fut
+            except Exception as e:  # don't let one city take down the rest
+                print(f"[warn] {e}", file=sys.stderr)
+                continue
+            for e in entries:
+                yield e
+    finally:
+        for t in tasks + list(s._fetched.values()):
+            t.cancel()
+        if own_client is not None:
+            await own_client.aclose()
+
+
+async def gather_entries(keys: List[str], labels: List[str], label_dates: Optional[Dict[str, date]] = None,
+                         today: Optional[date] = None, max_concurrency: int = DEFAULT_CONCURRENCY,
+                         client=None) -> List[Dict]:
+    """
+    Async counterpart of forecast.iter_entries(): all entries for `keys` x
+    `labels`, in `keys` order. At most max_concurrency requests are in flight.
+    """
+    order = {k: i for i, k in enumerate(keys)}
+    entries = [e async for e in aiter_entries(keys, labels, label_dates, today, max_concurrency, client)]
+    entries.sort(key=lambda e: order.get(e["key"], len(order)))
+    return entries
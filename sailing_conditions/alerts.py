@@ -0,0 +1,130 @@
+"""
+Active NWS alerts for every zone in a run, looked up in one batched request.
+
+Marine zone ids come from the TGFTP product paths (".../anz338.txt" ->
+ANZ338); grid cities contribute the public forecast zone from /points.
+Structured advisories (Small Craft Advisory, Gale Warning, ...) are attached
+to entries and drive the ❌ emoji and rating penalties, rather than keyword
+matching over the forecast text (which trips on "storm" in a synopsis).
+"""
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from .cities import CITIES
+from .emoji import is_severe
+
+ZONE_PATH_RE = re.compile(r"([a-z]{3}\d{3})\.txt$", re.I)
+
+# Rating points taken off while an advisory or watch is in effect. Any
+# "... Warning" caps the rating at WARNING_CAP and shows ❌ instead.
+ALERT_PENALTY = {
+    "Small Craft Advisory": 3,
+    "Brisk Wind Advisory": 3,
+    "Hazardous Seas Watch": 2,
+    "Gale Watch": 2,
+    "Storm Watch": 2,
+    "Dense Fog Advisory": 2,
+    "Wind Advisory": 2,
+    "Lake Wind Advisory": 2,
+}
+DEFAULT_PENALTY = 1  # any other advisory or watch; statements cost nothing
+WARNING_CAP = 1
+
+
+def marine_zone_id(rel_path: str) -> Optional[str]:
+    m = ZONE_PATH_RE.search(rel_path or "")
+    return m.group(1).upper() if m else None
+
+
+def city_zones(key: str, points: Optional[dict] = None) -> List[str]:
+    """
+    Zone ids whose alerts apply to a city. The public zone of a grid city comes
+    from its /points properties (looked up, cached, when not passed in).
+    """
+    meta = CITIES[key]
+    if meta["type"] == "marine":
+        return [z for z in (marine_zone_id(p) for p in meta.get("marine_zones") or []) if z]
+    if points is None:
+        from .fetchers import fetch_points
+
+        try:
+            points = fetch_points(meta["lat"], meta["lon"])
+        except Exception:
+            return []  # fetch_grid_periods reports the failure
+    zone_url = (points or {}).get("forecastZone") or ""
+    return [zone_url.rstrip("/").rsplit("/", 1)[-1]] if zone_url else []
+
+
+def load_alerts(keys: Iterable[str]) -> Dict[str, Optional[List[dict]]]:
+    """
+    One alerts/active query for all zones of `keys`: zone id -> advisories.
+    If the lookup fails every zone maps to None (unknown, as opposed to []).
+    """
+    from .fetchers import fetch_active_alerts
+
+    zones = sorted({z for key in keys for z in city_zones(key)})
+    if not zones:
+        return {}
+    return index_alerts(zones, fetch_active_alerts(zones))
+
+
+def index_alerts(zones: List[str], features: Optional[List[dict]]) -> Dict[str, Optional[List[dict]]]:
+    """Group alerts/active features by zone (all None when the lookup failed)."""
+    if features is None:
+        return {z: None for z in zones}
+    out: Dict[str, Optional[List[dict]]] = {z: [] for z in zones}
+    for f in features:
+        props = f.get("properties") or {}
+        adv = {
+            "id": props.get("id") or f.get("id"),
+            "event": props.get("event") or "",
+            "severity": props.get("severity"),
+            "headline": props.get("headline"),
+            "onset": props.get("onset") or props.get("effective"),
+            "ends": props.get("ends") or props.get("expires"),
+        }
+        ugc = (props.get("geocode") or {}).get("UGC") or [
+            u.rstrip("/").rsplit("/", 1)[-1] for u in props.get("affectedZones") or []
+        ]
+        for z in ugc:
+            if z in out:
+                out[z].append(adv)
+    return out
+
+
+def _local_day(ts: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(ts).astimezone().date() if ts else None
+    except ValueError:
+        return None
+
+
+def alerts_for(active: Dict[str, Optional[List[dict]]], zones: Iterable[str], day: date) -> Optional[List[dict]]:
+    """Advisories in effect on `day` in any of `zones` (deduplicated); None if unknown."""
+    seen, out = set(), []
+    for z in zones:
+        advs = active.get(z, [])
+        if advs is None:
+            return None
+        for a in advs:
+            ident = a["id"] or (a["event"], a["headline"])
+            if ident in seen:
+                continue
+            start, end = _local_day(a["onset"]), _local_day(a["ends"])
+            if (start and day < start) or (end and day > end) or (not end and day > date.today()):
+                continue
+            seen.add(ident)
+            out.append(a)
+    return out
+
+
+def apply_alerts(rating: int, alerts: Optional[List[dict]]) -> int:
+    if not alerts:
+        return rating
+    if is_severe(alerts):
+        return min(rating, WARNING_CAP)
+    penalty = max(ALERT_PENALTY.get(a["event"], DEFAULT_PENALTY if a["event"].endswith(("Advisory", "Watch")) else 0)
+                  for a in alerts)
+    return max(1, rating - penalty)
+
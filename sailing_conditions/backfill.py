@@ -0,0 +1,166 @@
+"""
+Re-score a directory of archived TGFTP marine products with the current
+parsers and rating, spread across a process pool.
+
+    sailing-conditions backfill ARCHIVE_DIR --out backfill.jsonl --workers 8
+
+Each product file becomes one JSON line: {"file", "sections": [{"zone",
+"label", "wind_dir", "wind_kt", "waves_ft", "sky", "rating"}, ...]}. Files
+already present in --out are skipped, so an interrupted run picks up where it
+stopped.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from typing import Iterator, List, Set, Tuple
+
+from .parsers import compute_rating, extract_day_blurb, parse_sky, parse_waves, parse_wind
+
+HEADING_RE = re.compile(r"(?m)^\s*\.([A-Z][A-Z /-]{2,}?)\.{3,}")
+ZONE_RE = re.compile(r"(?m)^([A-Z]{3}\d{3})[->]")
+
+
+def _read_product(path: str) -> str:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as fh:
+        return fh.read()
+
+
+def score_product(text: str) -> List[dict]:
+    """Parse and rate every day section of every zone segment in one product."""
+    out = []
+    for segment in (text or "").split("$$"):
+        zm = ZONE_RE.search(segment)
+        zone = zm.group(1) if zm else None
+        seen = set()
+        for hm in HEADING_RE.finditer(segment):
+            label = hm.group(1).strip()
+            if label in seen:
+                continue
+            seen.add(label)
+            sec = extract_day_blurb(segment, label)
+            if not sec:
+                continue
+            wdir, wrng = parse_wind(sec)
+            waves = parse_waves(sec)
+            sky = parse_sky(sec)
+            out.append({
+                "zone": zone, "label": label, "wind_dir": wdir,
+                "wind_kt": list(wrng) if wrng else None,
+                "waves_ft": list(waves) if waves else None,
+                "sky": sky, "rating": compute_rating(wrng, waves, sky),
+            })
+    return out
+
+
+def _score_chunk(chunk: Tuple[str, List[str]]) -> List[dict]:
+    root, rels = chunk
+    results = []
+    for rel in rels:
+        try:
+            sections = score_product(_read_product(os.path.join(root, rel)))
+            results.append({"file": rel, "sections": sections})
+        except Exception as e:
+            results.append({"file": rel, "error": str(e), "sections": []})
+    return results
+
+
+def _archive_files(root: str) -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            if not fn.startswith("."):
+                yield os.path.relpath(os.path.join(dirpath, fn), root)
+
+
+def _complete_length(fh, block: int = 1 << 16) -> int:
+    """Bytes up to and including the file's last newline, found by reading back from the end."""
+    pos = fh.seek(0, os.SEEK_END)
+    while pos > 0:
+        start = max(0, pos - block)
+        fh.seek(start)
+        nl = fh.read(pos - start).rfind(b"\n")
+        if nl >= 0:
+            return start + nl + 1
+        pos = start
+    return 0
+
+
+def _already_done(out_path: str) -> Set[str]:
+    """Files recorded in a previous run; drops a torn last line from an interruption."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "rb+") as fh:
+        keep = _complete_length(fh)
+        if keep < fh.seek(0, os.SEEK_END):
+            fh.truncate(keep)
+        fh.seek(0)
+        for ln in fh:  # line by line: results of years of archives can be hundreds of MB
+            try:
+                done.add(json.loads(ln)["file"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def run_backfill(root: str, out_path: str, workers: int = 0, chunk_size: int = 32) -> dict:
+    from multiprocessing import Pool
+
+    done = _already_done(out_path)
+    todo = [rel for rel in _archive_files(root) if rel not in done]
+    chunks = [(root, todo[i:i + chunk_size]) for i in range(0, len(todo), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if done:
+        print(f"[info] Resuming: {len(done)} files already scored, {len(todo)} to go.", file=sys.stderr)
+
+    files = sections = 0
+    t0 = time.perf_counter()
+    last = t0
+    with open(out_path, "a", encoding="utf-8") as out, Pool(workers) as pool:
+        for results in pool.imap_unordered(_score_chunk, chunks):
+            for r in results:
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+                sections += len(r["sections"])
+            files += len(results)
+            out.flush()
+            now = time.perf_counter()
+            if now - last >= 5:
+                print(f"[info] {files}/{len(todo)} files, {files / (now - t0):.0f} files/s", file=sys.stderr)
+                last = now
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "files": files, "sections": sections, "skipped": len(done), "workers": workers,
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(files / elapsed, 1) if elapsed else None,
+        "sections_per_s": round(sections / elapsed, 1) if elapsed else None,
+    }
+    print(f"[info] Backfill: {files} files, {sections} sections in {elapsed:.1f}s "
+          f"({stats['files_per_s']} files/s, {stats['sections_per_s']} sections/s, {workers} workers)",
+          file=sys.stderr)
+    return stats
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="sailing-conditions backfill",
+                                 description="Re-score archived marine products with the current parsers")
+    ap.add_argument("archive", help="Directory of archived TGFTP products (.txt or .gz)")
+    ap.add_argument("--out", default="backfill.jsonl", help="Results file (JSON lines, appended)")
+    ap.add_argument("--workers", type=int, default=0, help="Worker processes (default: all cores)")
+    ap.add_argument("--chunk-size", type=int, default=32, help="Files per task sent to a worker")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.archive):
+        print(f"[warn] Not a directory: {args.archive}", file=sys.stderr)
+        return 2
+    run_backfill(args.archive, args.out, args.workers, max(1, args.chunk_size))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+Per-host and per-URL circuit breakers for upstream fetches.
+
+A URL that fails (exception, 5xx or 404) is negatively cached for a short
+while; a host that fails HOST_FAILURES times in a row is opened as a whole.
+Once the cooldown passes the breaker goes half-open and lets a single probe
+through: success closes it, failure re-opens it for another cooldown.
+While a breaker is open http_get() raises CircuitOpen immediately, so callers
+fall through to their fallbacks (marine -> grid) without waiting out timeouts.
+"""
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+HOST_FAILURES = 3        # consecutive failures before a whole host is skipped
+HOST_COOLDOWN_S = 60.0
+URL_COOLDOWN_S = 120.0   # negative-cache lifetime of a single dead URL
+
+_lock = threading.Lock()
+_state: Dict[str, dict] = {}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of making a request to a host or URL known to be failing."""
+
+
+def _host(url: str) -> str:
+    return "host:" + (urlsplit(url).hostname or "")
+
+
+def _get(key: str) -> dict:
+    return _state.setdefault(key, {"failures": 0, "opened_at": None, "probing": False})
+
+
+def _allow(key: str, cooldown: float, now: float) -> Optional[bool]:
+    """True: closed. False: open (or its probe is out). None: half-open, the caller may probe."""
+    st = _state.get(key)
+    if not st or st["opened_at"] is None:
+        return True
+    if now - st["opened_at"] < cooldown or st["probing"]:
+        return False
+    return None
+
+
+def before_request(url: str) -> Tuple[str, ...]:
+    """
+    Raise CircuitOpen if the URL or its host is open. Otherwise return the
+    keys whose half-open probe this caller now holds; pass them to release()
+    if the request ends without record_response/record_failure.
+    """
+    now = time.monotonic()
+    host = _host(url)
+    with _lock:
+        # check both before taking either probe, so a refused call holds none
+        h, u = _allow(host, HOST_COOLDOWN_S, now), _allow(url, URL_COOLDOWN_S, now)
+        if h is False:
+            raise CircuitOpen(f"circuit open for {urlsplit(url).hostname}")
+        if u is False:
+            raise CircuitOpen(f"recent failure cached for {url}")
+        probes = tuple(k for k, ok in ((host, h), (url, u)) if ok is None)
+        for k in probes:
+            _state[k]["probing"] = True
+    return probes
+
+
+def release(probes: Tuple[str, ...]) -> None:
+    """Give back probe slots from before_request() for a request that recorded no outcome."""
+    with _lock:
+        for k in probes:
+            st = _state.get(k)
+            if st:
+                st["probing"] = False
+
+
+def _close(key: str) -> None:
+    st = _state.get(key)
+    if st:
+        st.update(failures=0, opened_at=None, probing=False)
+
+
+def _fail(key: str, threshold: int, label: str) -> None:
+    st = _get(key)
+    st["failures"] += 1
+    was_open = st["opened_at"] is not None
+    if st["probing"] or st["failures"] >= threshold:
+        st["opened_at"] = time.monotonic()
+        st["probing"] = False
+        if key.startswith("host:") and not was_open:
+            print(f"[warn] {label} failing; skipping it for {HOST_COOLDOWN_S:.0f}s", file=sys.stderr)
+
+
+def record_success(url: str) -> None:
+    with _lock:
+        _close(_host(url))
+        _close(url)
+
+
+def record_failure(url: str, host_too: bool = True) -> None:
+    """Count a failure against the URL and (for timeouts, errors and 5xx) its host."""
+    with _lock:
+        _fail(url, 1, url)
+        if host_too:
+            _fail(_host(url), HOST_FAILURES, urlsplit(url).hostname or url)
+        else:
+            _close(_host(url))  # the host answered; only this path is bad
+
+
+def record_response(url: str, status_code: Optional[int]) -> None:
+    if status_code is None or status_code >= 500:
+        record_failure(url)
+    elif status_code == 404 or status_code == 410:
+        record_failure(url, host_too=False)
+    else:
+        record_success(url)
+
+
+def reset() -> None:
+    with _lock:
+        _state.clear()
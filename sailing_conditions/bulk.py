@@ -0,0 +1,213 @@
+"""
+Ratings for arbitrary coordinates (marinas, launch ramps) in bulk.
+
+    sailing-conditions bulk points.csv --label TODAY,SATURDAY --out ratings.csv
+
+Each point is resolved to its NWS grid cell (WFO, gridX, gridY) through a
+/points lookup that is cached on disk, and every distinct cell's forecast is
+fetched once and fanned back out to all the points in it. Network cost scales
+with the number of cells, not points. The points file is CSV or whitespace
+separated "name,lat,lon" (or just "lat,lon"); blank lines, "#" comments and a
+header row are skipped.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import POINTS_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    lat     REAL    NOT NULL,
+    lon     REAL    NOT NULL,
+    wfo     TEXT,              -- NULL: outside NWS coverage (404)
+    grid_x  INTEGER,
+    grid_y  INTEGER,
+    zone    TEXT,
+    fetched INTEGER NOT NULL,
+    PRIMARY KEY (lat, lon)
+) WITHOUT ROWID;
+"""
+POINTS_TTL_S = 30 * 86400  # grid assignments change only when an office re-grids
+FORECAST_URL = "https://api.weather.gov/gridpoints/{wfo}/{x},{y}/forecast"
+TABLE_FIELDS = ["name", "lat", "lon", "cell", "label", "rating", "wind_dir", "wind_lo", "wind_hi", "sky"]
+
+Cell = Tuple[str, int, int]
+
+
+def read_points(path: str) -> List[Tuple[str, float, float]]:
+    out = []
+    with open(path, encoding="utf-8") as fh:
+        for ln in fh:
+            ln = ln.split("#", 1)[0].strip()
+            if not ln:
+                continue
+            sep = "," if "," in ln else " "
+            parts = [p.strip() for p in (ln.split(",") if sep == "," else ln.split())]
+            try:
+                lat, lon = float(parts[-2]), float(parts[-1])
+            except (ValueError, IndexError):
+                continue  # header or junk
+            name = sep.join(parts[:-2]) or f"{lat:.4f},{lon:.4f}"
+            out.append((name, round(lat, 4), round(lon, 4)))
+    return out
+
+
+def open_points_cache(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or POINTS_DB
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _lookup(latlon: Tuple[float, float]) -> Optional[tuple]:
+    """(wfo, x, y, zone) for a point, (None,)*4 if NWS has no grid there, None on error."""
+    from .fetchers import http_get
+
+    lat, lon = latlon
+    try:
+        r = http_get(f"https://api.weather.gov/points/{lat},{lon}")
+        if r.status_code == 404:
+            return (None, None, None, None)
+        r.raise_for_status()
+        p = r.json()["properties"]
+        zone = (p.get("forecastZone") or "").rstrip("/").rsplit("/", 1)[-1] or None
+        return (p["gridId"], int(p["gridX"]), int(p["gridY"]), zone)
+    except Exception as e:
+        print(f"[warn] /points {lat},{lon} failed: {e}", file=sys.stderr)
+        return None
+
+
+def resolve_cells(conn: sqlite3.Connection, latlons, workers: int = 4) -> Dict[Tuple[float, float], Optional[Cell]]:
+    """Map each (lat, lon) to its grid cell, from the cache where fresh and /points otherwise."""
+    now = int(time.time())
+    cells: Dict[Tuple[float, float], Optional[Cell]] = {}
+    todo = []
+    for ll in set(latlons):
+        row = conn.execute("SELECT wfo, grid_x, grid_y, fetched FROM points WHERE lat=? AND lon=?", ll).fetchone()
+        if row and now - row[3] < POINTS_TTL_S:
+            cells[ll] = (row[0], row[1], row[2]) if row[0] else None
+        else:
+            todo.append(ll)
+    if todo:
+        with ThreadPoolExecutor(workers) as pool:
+            found = list(zip(todo, pool.map(_lookup, todo)))
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO points VALUES (?,?,?,?,?,?,?)",
+                             [ll + res + (now,) for ll, res in found if res is not None])
+        for ll, res in found:
+            cells[ll] = (res[0], res[1], res[2]) if res and res[0] else None
+    return cells
+
+
+def _cell_periods(cell: Cell) -> Optional[List[dict]]:
+    from .fetchers import http_get
+
+    try:
+        r = http_get(FORECAST_URL.format(wfo=cell[0], x=cell[1], y=cell[2]))
+        r.raise_for_status()
+        return r.json()["properties"]["periods"]
+    except Exception as e:
+        print(f"[warn] Forecast for cell {cell[0]}/{cell[1]},{cell[2]} failed: {e}", file=sys.stderr)
+        return None
+
+
+def _rate(periods: Optional[List[dict]], label: str) -> dict:
+    from .fetchers import grid_pick_day
+    from .forecast import _wind_from_grid
+    from .parsers import compute_rating
+
+    p = grid_pick_day(periods, label.title()) if periods else None
+    if not p:
+        return {"rating": None, "wind_dir": None, "wind_lo": None, "wind_hi": None, "sky": None}
+    wrng = _wind_from_grid(p)
+    sky = (p.get("shortForecast") or p.get("detailedForecast") or "").lower() or None
+    return {"rating": compute_rating(wrng, None, sky), "wind_dir": p.get("windDirection"),
+            "wind_lo": wrng[0] if wrng else None, "wind_hi": wrng[1] if wrng else None, "sky": sky}
+
+
+def _no_stage(name: str):
+    return nullcontext()
+
+
+def run_bulk(points: List[Tuple[str, float, float]], labels: List[str], conn: sqlite3.Connection,
+             workers: int = 4, stage=None) -> Iterator[dict]:
+    """
+    Yield one table row per point and label; each distinct cell's forecast is
+    fetched once. Pass memprofile.stage as `stage` to profile the steps.
+    """
+    stage = stage or _no_stage
+    t0 = time.perf_counter()
+    with stage("resolve"):
+        cells = resolve_cells(conn, [(lat, lon) for _, lat, lon in points], workers)
+    unique = sorted({c for c in cells.values() if c})
+    with stage("forecasts"):
+        with ThreadPoolExecutor(workers) as pool:
+            periods = dict(zip(unique, pool.map(_cell_periods, unique)))
+    with stage("rate"):
+        rated = {(c, lab): _rate(periods[c], lab) for c in unique for lab in labels}
+    print(f"[info] {len(points)} points in {len(unique)} grid cells; "
+          f"forecasts fetched in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    for name, lat, lon in points:
+        cell = cells.get((lat, lon))
+        for lab in labels:
+            row = {"name": name, "lat": lat, "lon": lon, "label": lab.title(),
+                   "cell": f"{cell[0]}/{cell[1]},{cell[2]}" if cell else None}
+            row.update(rated[(cell, lab)] if cell else _rate(None, lab))
+            yield row
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="sailing-conditions bulk",
+                                 description="Rate many arbitrary points, one forecast fetch per NWS grid cell")
+    ap.add_argument("points", help="CSV/whitespace file of name,lat,lon")
+    ap.add_argument("--label", default="TODAY", help="Comma-separated day labels (TODAY, TOMORROW, SATURDAY, ...)")
+    ap.add_argument("--out", default="-", help="Output CSV (default stdout)")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    ap.add_argument("--cache", default=None, help=f"/points cache database (default {POINTS_DB})")
+    ap.add_argument("--memprofile", nargs="?", const="", default=None, metavar="PATH",
+                    help="Report allocations per stage and peak RSS on stderr (and append them to PATH as JSON)")
+    args = ap.parse_args(argv)
+
+    # memprofile loads tracemalloc (and pickle, tokenize, ...): only when asked for
+    stage, mem_report = _no_stage, None
+    if args.memprofile is not None:
+        from .memprofile import report as mem_report, stage, start
+
+        start("bulk")
+    with stage("points"):
+        points = read_points(args.points)
+    if not points:
+        print(f"[warn] No points in {args.points}", file=sys.stderr)
+        return 2
+    labels = [lab.strip().upper() for lab in args.label.split(",") if lab.strip()]
+    conn = open_points_cache(args.cache)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+    try:
+        writer = csv.DictWriter(out, fieldnames=TABLE_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(run_bulk(points, labels, conn, max(1, args.workers), stage))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        conn.close()
+    from .ratelimit import report
+
+    report()
+    if mem_report:
+        mem_report(args.memprofile or None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
-import argparse, calendar
+import argparse, calendar, os, sys, time
+from contextlib import nullcontext
 from datetime import date, timedelta
-from typing import List
+from typing import List, Optional
 from .cities import CITIES
 from .config import DEFAULT_KEYS
-from .parsers import extract_day_blurb
-from .fetchers import fetch_city_marine_text
-from .forecast import chicago_forecast, marine_city_forecast, grid_city_forecast, _pick_present_day_label
-from .formatters import format_slack_line_city, build_email_html
-from .senders import send_email_html, post_slack
+
+# Fetching, forecasting and delivery pull in requests, smtplib, ssl and
+# email.mime; they are imported inside main() only once a stage needs them.
+
+# Seconds of a --deadline budget held back for Slack/email delivery
+DELIVERY_RESERVE_S = 15.0
+# Cities built at once under a --deadline budget
+BUILD_WORKERS = 4
 
 # Suggestions for non-sailing cities
 OUTDOOR_SUGG = [
@@ -36,20 +40,20 @@ NEUTRAL_SUGG = [
 ]
 
 RAINY_WORDS = {"rain", "showers", "thunder", "storm", "t-storm", "drizzle"}
-SEVERE_WORDS = {"hazard", "warning", "gale", "storm", "hurricane", "hvy freezing spray"}
 
 
 def _is_rainy(sky: str | None) -> bool:
     return bool(sky) and any(k in sky.lower() for k in RAINY_WORDS)
 
 
-def pick_suggestion(city_label: str, sky: str | None) -> str:
+def pick_suggestion(city_label: str, sky: str | None, alerts: list | None = None) -> str:
     import os, random
+    from .emoji import is_severe
 
     stable = os.environ.get("SUGGESTION_MODE", "").lower() == "stable"
     rng = random.Random(f"{city_label}-{date.today().isoformat()}") if stable else random.SystemRandom()
 
-    if sky and any(k in sky.lower() for k in SEVERE_WORDS):
+    if is_severe(alerts):
         return "Best bet: stay indoors and keep an eye on the radar."
     if _is_rainy(sky):
         return "Aw shoot — " + rng.choice(INDOOR_SUGG)
@@ -100,7 +104,204 @@ def _resolve_city_selection(args, unknown: List[str]) -> List[str]:
     return DEFAULT_KEYS.copy()
 
 
-def main():
+def _stream_entries(sel: List[str], labels: List[str], label_day: dict, today_dt: date,
+                    budget: Optional[float] = None):
+    """
+    Yield entries as each city finishes. With a budget, cities are built on
+    BUILD_WORKERS daemon threads, so one hung city does not hold up the others,
+    and whatever arrives before the budget runs out is yielded, followed by
+    'data unavailable' placeholders for the rest; fetches still in flight are
+    abandoned and later ones fail fast via the fetchers deadline.
+    """
+    from .forecast import iter_entries, unavailable_entry
+
+    if budget is None:
+        yield from iter_entries(sel, labels, label_day, today_dt)
+        return
+
+    import queue
+    import threading
+    from .fetchers import set_deadline
+
+    set_deadline(budget)
+    end_at = time.monotonic() + budget
+    q = queue.Queue()
+    keys = queue.Queue()
+    for key in sel:
+        keys.put(key)
+    workers = max(1, min(BUILD_WORKERS, len(sel)))
+
+    def work(active):
+        try:
+            while True:
+                try:
+                    key = keys.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    for e in iter_entries([key], labels, label_day, today_dt, active):
+                        q.put(e)
+                except Exception as e:  # don't let one city take down the digest
+                    print(f"[warn] {key}: {e}", file=sys.stderr)
+        finally:
+            q.put(None)
+
+    def start():
+        from .alerts import load_alerts
+
+        try:
+            active = load_alerts(sel)  # one batched lookup for every city
+        except Exception as e:
+            print(f"[warn] Alerts lookup failed: {e}", file=sys.stderr)
+            active = {}
+        for i in range(workers):
+            threading.Thread(target=work, args=(active,), name=f"build-entries-{i}", daemon=True).start()
+
+    threading.Thread(target=start, name="build-alerts", daemon=True).start()
+    got = {}  # key -> labels delivered
+    done = 0
+    while done < workers:
+        try:
+            e = q.get(timeout=max(0.0, end_at - time.monotonic()))
+        except queue.Empty:
+            print(f"[warn] Deadline reached after {budget:.0f}s; sending partial results.", file=sys.stderr)
+            break
+        if e is None:
+            done += 1
+            continue
+        got.setdefault(e["key"], set()).add(e["label"].upper())
+        yield e
+
+    today_labels = labels == ["REST OF TODAY", "TODAY"]
+    for key in sel:
+        have = got.get(key, set())
+        missing = (["TODAY"] if not have else []) if today_labels else [lab for lab in labels if lab not in have]
+        for lab in missing:
+            e = unavailable_entry(key, lab)
+            e["date"] = label_day.get(lab, today_dt).isoformat()
+            yield e
+
+
+def _no_stage(name: str):
+    return nullcontext()
+
+
+def _send_all(sends: List[tuple], deadline: Optional[float], started: float) -> None:
+    """
+    Run (name, send, default timeout) sends. Without a deadline they run one
+    after another as usual. With one they run at the same time on daemon
+    threads, and only the time left is waited for: the socket timeout of a
+    send bounds each operation, not the whole send.
+    """
+    if deadline is None:
+        for _, send, timeout in sends:
+            send(timeout=timeout)
+        return
+
+    import threading
+
+    end_at = started + deadline
+    left = end_at - time.monotonic()
+    if left <= 0:
+        for name, _, _ in sends:
+            print(f"[warn] Deadline reached before delivery; skipping {name} send.", file=sys.stderr)
+        return
+    threads = []
+    for name, send, timeout in sends:
+        t = threading.Thread(target=send, kwargs={"timeout": min(timeout, left)}, name=f"send-{name.lower()}",
+                             daemon=True)
+        t.start()
+        threads.append((name, t))
+    for name, t in threads:
+        t.join(max(0.0, end_at - time.monotonic()))
+        if t.is_alive():
+            print(f"[warn] Deadline reached; not waiting for the {name} send.", file=sys.stderr)
+
+
+def _deliver(entries: List[dict], today_dt: date, args, started: float, record_history: bool = True) -> None:
+    """
+    History, Slack/email rendering and the one send of a run (also used by
+    `merge`). Re-deliveries of a snapshot pass record_history=False: their
+    entries were recorded when the snapshot's run delivered them.
+    """
+    from .formatters import format_slack_line_city, format_slack_line_unavailable, build_email_html
+
+    # Delivery defaults: if nothing specified, send both
+    # (with --format, records are the output: only send when explicitly asked)
+    explicit = args.email or args.slack or args.all_delivery
+    send_email_flag = args.email or args.all_delivery or (not explicit and not args.format)
+    send_slack_flag = args.slack or args.all_delivery or (not explicit and not args.format)
+
+    if record_history and (args.history is not None or os.environ.get("SAILING_HISTORY_DB")):
+        from .history import open_history, record_entries
+
+        try:
+            conn = open_history(args.history or None)
+            record_entries(conn, entries)
+            conn.close()
+        except Exception as e:
+            print(f"[warn] History write failed: {e}", file=sys.stderr)
+
+    # Slack text
+    lines = [
+        format_slack_line_unavailable(e["prefix"], e["city"], e["label"])
+        if e.get("unavailable") else
+        format_slack_line_city(
+            e["prefix"],
+            e["city"],
+            e["label"],
+            e["rating"],
+            e["wind_line"],
+            e["waves_line"],
+            e["sky_line"],
+            e["sailing"],
+            None if e["sailing"] else pick_suggestion(e["city"], e["sky_line"], e.get("alerts")),
+        )
+        for e in entries
+    ]
+    slack_text = "\n".join(lines) if lines else "No data."
+
+    # Email
+    try:
+        date_str = today_dt.strftime("%a %b %-d, %Y")
+    except Exception:
+        date_str = today_dt.strftime("%a %b %d, %Y")
+    subject = "Sailing Quick Hits — Multi-City"
+    text_fallback = "\n".join(f"{e['prefix']} {e['city']} — {e['quick']}" for e in entries)
+    html = build_email_html(entries, date_str)
+
+    # Send
+    sends = []
+    if send_email_flag:
+        from .senders import send_email_html
+
+        sends.append(("Email", lambda timeout: send_email_html(subject, html, text_fallback, timeout=timeout), 20))
+    if send_slack_flag:
+        from .senders import post_slack
+
+        sends.append(("Slack", lambda timeout: post_slack(slack_text, timeout=timeout), 10))
+    _send_all(sends, args.deadline, started)
+
+    # Print once
+    if not args.format:
+        print(text_fallback)
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "backfill":
+        from .backfill import main as backfill_main
+
+        return backfill_main(argv[1:])
+    if argv and argv[0] == "bulk":
+        from .bulk import main as bulk_main
+
+        return bulk_main(argv[1:])
+    if argv and argv[0] == "merge":
+        from .shards import main as merge_main
+
+        return merge_main(argv[1:])
+
     parser = argparse.ArgumentParser(description="Multi-city Sailing Quick Hits (refactored)")
 
     # Day (mutually exclusive)
@@ -124,17 +325,79 @@ def main():
     parser.add_argument("--kc", action="store_true")
     parser.add_argument("--slc", action="store_true")
 
-    args, unknown = parser.parse_known_args()
+    # Machine-readable output
+    parser.add_argument("--format", choices=["jsonl", "csv", "json"],
+                        help="Write entry records to stdout as they arrive (no delivery unless asked for)")
+
+    # Time budget
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="Total time budget; cities not ready in time are sent as 'data unavailable'")
+
+    # Sharding
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Build only shard I of N (1-based) of the selected cities; deliver later with `merge`")
+    parser.add_argument("--shard-dir", default=None, help="Directory shared by the shards (default under SAILING_CACHE_DIR)")
+    parser.add_argument("--run-id", default=None, help="Groups the shards of one run (default: date and day mode)")
+
+    # Run snapshots
+    parser.add_argument("--from-snapshot", nargs="?", const="", default=None, metavar="PATH",
+                        help="Re-render and re-deliver a saved run (default: the latest) without fetching")
+    parser.add_argument("--no-snapshot", action="store_true", help="Don't save a snapshot of this run")
+
+    # Gridpoint raw data
+    parser.add_argument("--grid-data", action="store_true",
+                        help="Use gridpoint raw data for numeric wind, gusts and waves (grid and Great Lakes cities)")
+
+    # Local history
+    parser.add_argument("--history", nargs="?", const="", default=None, metavar="DB",
+                        help="Append entries and buoy obs to the history store (default DB from SAILING_HISTORY_DB)")
+    parser.add_argument("--result-cache", nargs="?", const="", default=None, metavar="DB",
+                        help="Reuse computed entries when upstream products are unchanged (default DB from SAILING_RESULT_DB)")
+
+    # Profiling
+    parser.add_argument("--memprofile", nargs="?", const="", default=None, metavar="PATH",
+                        help="Report allocations per stage and peak RSS on stderr (and append them to PATH as JSON)")
+
+    args, unknown = parser.parse_known_args(argv)
+    started = time.monotonic()
+    # memprofile loads tracemalloc (and pickle, tokenize, ...): only when asked for
+    stage, mem_report = _no_stage, None
+    if args.memprofile is not None:
+        from .memprofile import report as mem_report, stage, start
+
+        start("run")
+    build_budget = None
+    if args.deadline is not None:
+        # keep some of the budget back so delivery itself finishes on time
+        build_budget = max(0.0, args.deadline - min(DELIVERY_RESERVE_S, args.deadline * 0.25))
 
     # --all means both
     if args.all:
         args.all_cities = True
         args.all_delivery = True
 
-    # Delivery defaults: if nothing specified, send both
-    explicit = args.email or args.slack or args.all_delivery
-    send_email_flag = args.email or args.all_delivery or (not explicit)
-    send_slack_flag = args.slack or args.all_delivery or (not explicit)
+    if args.from_snapshot is not None:
+        from .snapshot import load_snapshot
+
+        try:
+            with stage("load-snapshot"):
+                snap = load_snapshot(args.from_snapshot)
+        except (OSError, ValueError) as e:
+            print(f"[warn] Snapshot unavailable: {e}", file=sys.stderr)
+            return 2
+        t0 = time.perf_counter()
+        with stage("deliver"):
+            entries = snap["entries"]
+            if args.format:
+                from .formatters import stream_records
+
+                entries = list(stream_records(entries, args.format, sys.stdout))
+            _deliver(entries, date.fromisoformat(snap["today"]), args, started, record_history=False)
+        print(f"[info] Re-rendered {len(entries)} entries in {(time.perf_counter() - t0) * 1000:.1f} ms",
+              file=sys.stderr)
+        if mem_report:
+            mem_report(args.memprofile or None)
+        return 0
 
     # Cities
     sel = _resolve_city_selection(args, unknown)
@@ -154,6 +417,7 @@ def main():
     else:
         labels = ["REST OF TODAY", "TODAY"]
         label_dates = [today_dt]
+    label_day = dict(zip(labels, label_dates))
 
     # Chicago season gate
     if "chicago" in sel and not any(in_season(d) for d in label_dates):
@@ -162,65 +426,72 @@ def main():
             return 0
         sel = [k for k in sel if k != "chicago"]
 
-    # Build entries
-    entries = []
-    for key in sel:
-        # Choose concrete "today" label that actually exists for marine products
-        if labels == ["REST OF TODAY", "TODAY"]:
-            if CITIES[key]["type"] == "marine":
-                mt = fetch_city_marine_text(CITIES[key].get("marine_zones") or [])
-                use_label = _pick_present_day_label(mt) if mt else "TODAY"
-            else:
-                use_label = "TODAY"
-            entries_labels = [use_label]
-        else:
-            entries_labels = labels
-
-        for lab in entries_labels:
-            meta = CITIES[key]
-            if key == "chicago":
-                e = chicago_forecast(lab)
-            else:
-                if meta["type"] == "marine":
-                    e = marine_city_forecast(key, lab)
-                else:
-                    e = grid_city_forecast(key, lab)
-            entries.append(e)
-
-    # Slack text
-    lines = [
-        format_slack_line_city(
-            e["prefix"],
-            e["city"],
-            e["label"],
-            e["rating"],
-            e["wind_line"],
-            e["waves_line"],
-            e["sky_line"],
-            e["sailing"],
-            None if e["sailing"] else pick_suggestion(e["city"], e["sky_line"]),
-        )
-        for e in entries
-    ]
-    slack_text = "\n".join(lines) if lines else "No data."
-
-    # Email
-    try:
-        date_str = today_dt.strftime("%a %b %-d, %Y")
-    except Exception:
-        date_str = today_dt.strftime("%a %b %d, %Y")
-    subject = "Sailing Quick Hits — Multi-City"
-    text_fallback = "\n".join(f"{e['prefix']} {e['city']} — {e['quick']}" for e in entries)
-    html = build_email_html(entries, date_str)
-
-    # Send
-    if send_email_flag:
-        send_email_html(subject, html, text_fallback)
-    if send_slack_flag:
-        post_slack(slack_text)
+    # Sharded run: this process builds only its slice and leaves delivery to `merge`
+    full_sel, shard, run_id = sel, None, None
+    if args.shard:
+        from .shards import default_run_id, parse_shard, shard_keys
+
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        run_id = args.run_id or default_run_id(today_dt, labels)
+        sel = shard_keys(full_sel, *shard)
+
+    if args.result_cache is not None or os.environ.get("SAILING_RESULT_DB"):
+        from .config import RESULT_DB
+        from .results import configure
+
+        try:
+            configure(args.result_cache or RESULT_DB)
+        except Exception as e:
+            print(f"[warn] Result store unavailable: {e}", file=sys.stderr)
+
+    if not args.no_snapshot and not args.shard:
+        from .fetchers import capture_responses
+
+        capture_responses()
+    if args.grid_data:
+        from .fetchers import use_grid_data
+
+        use_grid_data()
+
+    # Build entries (within the time budget, if one was given), writing
+    # machine-readable records as each one arrives
+    with stage("build"):
+        stream = _stream_entries(sel, labels, label_day, today_dt, build_budget)
+        if args.format:
+            from .formatters import stream_records
+
+            stream = stream_records(stream, args.format, sys.stdout)
+        entries = list(stream)
+        order = {k: i for i, k in enumerate(sel)}
+        entries.sort(key=lambda e: order.get(e["key"], len(order)))  # placeholders join their city
+
+    if not args.no_snapshot and not args.shard:  # a shard holds part of a digest: merge delivers it
+        from .fetchers import captured
+        from .snapshot import write_snapshot
+
+        try:
+            with stage("snapshot"):
+                write_snapshot(entries, captured(), sel, labels, label_day, today_dt)
+        except OSError as e:
+            print(f"[warn] Snapshot not saved: {e}", file=sys.stderr)
+
+    if args.shard:
+        from .shards import write_partial
+
+        with stage("shard-write"):
+            path = write_partial(args.shard_dir, run_id, shard, full_sel, labels, label_day, today_dt, entries)
+        print(f"[info] Shard {shard[0]}/{shard[1]}: {len(entries)} entries written to {path}", file=sys.stderr)
+    else:
+        with stage("deliver"):
+            _deliver(entries, today_dt, args, started)
+    from .ratelimit import report
 
-    # Print once
-    print(text_fallback)
+    report()
+    if mem_report:
+        mem_report(args.memprofile or None)
     return 0
 
 
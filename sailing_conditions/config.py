@@ -1,4 +1,13 @@
+import os
+
 NWS_UA = "SailingQuickHits/6.0 (contact: you@example.com)"
+# Per-host request pacing (token bucket): (requests per second, burst)
+RATE_LIMITS = {
+    "api.weather.gov": (5.0, 10),
+    "tgftp.nws.noaa.gov": (10.0, 20),
+    "www.ndbc.noaa.gov": (2.0, 4),
+}
+DEFAULT_RATE_LIMIT = (5.0, 10)
 TGFTP_ROOT = "https://tgftp.nws.noaa.gov/data/forecasts"
 
 # Chicago nearshore LMZ set + CHII2 obs
@@ -12,5 +21,13 @@ CHICAGO_NEARSHORE = [
 ]
 NDBC_STATION = "CHII2"  # Harrison-Dever Crib
 NDBC_REALTIME = "https://www.ndbc.noaa.gov/data/realtime2/{station}.txt"
+ALERTS_ACTIVE = "https://api.weather.gov/alerts/active?zone={zones}"
+
+DEFAULT_KEYS = ["chicago", "philly", "kc", "slc", "nyc"]
 
-DEFAULT_KEYS = ["chicago", "philly", "kc", "slc", "nyc"]
\ No newline at end of file
+# Local state (history, caches) lives here unless overridden
+CACHE_DIR = os.environ.get("SAILING_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "sailing_conditions")
+HISTORY_DB = os.environ.get("SAILING_HISTORY_DB") or os.path.join(CACHE_DIR, "history.sqlite3")
+RESULT_DB = os.environ.get("SAILING_RESULT_DB") or os.path.join(CACHE_DIR, "results.sqlite3")
+POINTS_DB = os.environ.get("SAILING_POINTS_DB") or os.path.join(CACHE_DIR, "points.sqlite3")
+TGFTP_VARIANTS = os.path.join(CACHE_DIR, "tgftp_variants.json")  # which URL form answered, per path
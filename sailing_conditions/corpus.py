@@ -0,0 +1,187 @@
+"""
+Memory-mapped reader for large archives of concatenated NWS text products.
+
+Product boundaries (SOH or the WMO abbreviated heading line) and ".DAY..."
+period headings are found with bytes regexes run directly over the mmap, so
+nothing is copied or decoded until a caller asks for a view's text. Memory
+use stays flat no matter how large the archive is.
+
+    with open_corpus("archive.txt") as corpus:
+        for product in corpus.products():
+            sec = product.section("TODAY")
+            if sec:
+                print(product.wmo_header(), sec.text()[:80])
+"""
+import mmap
+import re
+import sys
+import time
+from typing import Iterator, List, Optional
+
+# SOH-framed products, or a WMO abbreviated heading such as "FZUS53 KLOT 151445".
+# The SOH need not start a line: LDM/NOAAPort archives put the previous
+# product's ETX right before it.
+PRODUCT_START_RE = re.compile(rb"(?m)\x01|^[A-Z]{4}\d{2} [A-Z]{4} \d{6}\b")
+# What may precede the WMO heading in one product: SOH, line breaks and the
+# NOAAPort sequence-number line, as in "\x01\r\r\n123 \r\r\nFZUS51 KBUF ..."
+_LEAD_RE = re.compile(rb"\x01?\s*(?:\d{3,}[ \t]*\r*\n\s*)?")
+_MAX_LEAD = 32
+# Day headings such as ".TODAY..." or "TUESDAY NIGHT...". Stricter than
+# parsers.extract_day_blurb(), which is case-insensitive and allows any leading
+# whitespace: only upper case, indented by spaces or tabs, so lower-case prose
+# ending in "..." does not open a section.
+DAY_HEADING_RE = re.compile(rb"(?m)^[ \t]*\.?([A-Z][A-Z /-]{2,}?)\.{3,}")
+SEGMENT_END = b"\n$$"
+
+
+def _before_etx(buf, end: int) -> int:
+    """Drop the ETX (and the line breaks around it) that closes an SOH-framed product."""
+    at = end
+    while buf[at - 1:at] in (b"\r", b"\n"):
+        at -= 1
+    if buf[at - 1:at] != b"\x03":
+        return end
+    at -= 1
+    while buf[at - 1:at] in (b"\r", b"\n"):
+        at -= 1
+    return at
+
+
+def _decode(buf, start: int, end: int) -> str:
+    return buf[start:end].decode("utf-8", "replace").replace("\r", "")
+
+
+class SectionView:
+    """One ".DAY..." section of a product: byte offsets into the shared buffer."""
+
+    __slots__ = ("_buf", "heading", "start", "end")
+
+    def __init__(self, buf, heading: str, start: int, end: int):
+        self._buf, self.heading, self.start, self.end = buf, heading, start, end
+
+    def text(self) -> str:
+        return _decode(self._buf, self.start, self.end).strip()
+
+    def __repr__(self):
+        return f"SectionView({self.heading!r}, {self.start}:{self.end})"
+
+
+class ProductView:
+    """One text product within the archive; decodes nothing until asked."""
+
+    __slots__ = ("_buf", "start", "end")
+
+    def __init__(self, buf, start: int, end: int):
+        self._buf, self.start, self.end = buf, start, end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def wmo_header(self) -> str:
+        at = _LEAD_RE.match(self._buf, self.start, self.end).end()  # SOH, blank and sequence lines
+        nl = self._buf.find(b"\n", at, self.end)
+        return _decode(self._buf, at, nl if nl >= 0 else self.end).strip()
+
+    def text(self) -> str:
+        return _decode(self._buf, self.start, self.end)
+
+    def sections(self) -> Iterator[SectionView]:
+        """Day sections in order; a section ends at the next heading or at a "$$" segment end."""
+        buf, end = self._buf, self.end
+        prev = None
+        for m in DAY_HEADING_RE.finditer(buf, self.start, end):
+            if prev is not None:
+                yield self._close(prev, m.start())
+            prev = (m.group(1).decode("ascii").strip(), m.start())
+        if prev is not None:
+            yield self._close(prev, end)
+
+    def _close(self, prev, stop: int) -> SectionView:
+        heading, start = prev
+        seg_end = self._buf.find(SEGMENT_END, start, stop)
+        return SectionView(self._buf, heading, start, seg_end if seg_end >= 0 else stop)
+
+    def section(self, label: str) -> Optional[SectionView]:
+        """First section whose heading is `label` (or "`label` NIGHT")."""
+        want = " ".join(label.upper().split())
+        for sec in self.sections():
+            if sec.heading == want or sec.heading == want + " NIGHT":
+                return sec
+        return None
+
+
+class Corpus:
+    """A memory-mapped archive file; use as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._mm = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._fh.close()
+
+    def __len__(self):
+        return len(self._mm)
+
+    def products(self) -> Iterator[ProductView]:
+        buf = self._mm
+        prev = None
+        for m in PRODUCT_START_RE.finditer(buf):
+            if prev is not None:
+                if (buf[prev:prev + 1] == b"\x01" and m.start() - prev <= _MAX_LEAD
+                        and _LEAD_RE.fullmatch(buf, prev, m.start())):
+                    continue  # WMO heading right after SOH (and sequence number): same product
+                yield ProductView(buf, prev, _before_etx(buf, m.start()))
+            prev = m.start()
+        if prev is None and len(buf):
+            yield ProductView(buf, 0, len(buf))  # a single bare product
+        elif prev is not None:
+            yield ProductView(buf, prev, _before_etx(buf, len(buf)))
+
+
+def open_corpus(path: str) -> Corpus:
+    return Corpus(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Scan product archives: count products and day sections")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--label", help="Print the first matching day section of each product")
+    args = ap.parse_args(argv)
+
+    nbytes = products = sections = 0
+    t0 = time.perf_counter()
+    for path in args.paths:
+        with open_corpus(path) as corpus:
+            nbytes += len(corpus)
+            for product in corpus.products():
+                products += 1
+                if args.label:
+                    sec = product.section(args.label)
+                    if sec:
+                        sections += 1
+                        print(f"{product.wmo_header()}\t{' '.join(sec.text().split())}")
+                else:
+                    sections += sum(1 for _ in product.sections())
+    elapsed = time.perf_counter() - t0
+    print(f"[info] {products} products, {sections} sections, {nbytes / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({nbytes / 1e6 / elapsed if elapsed else 0:.0f} MB/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
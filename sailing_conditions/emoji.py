@@ -1,16 +1,15 @@
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
-SEVERE_WORDS = {"hazard", "warning", "gale", "storm", "hurricane", "hvy freezing spray"}
-
-def is_severe(text: Optional[str]) -> bool:
-    return bool(text) and any(k in text.lower() for k in SEVERE_WORDS)
+def is_severe(alerts: Optional[List[dict]]) -> bool:
+    """A warning (Gale, Storm, Special Marine, ...) is in effect; see alerts.py."""
+    return any(a["event"].endswith("Warning") for a in alerts or [])
 
 def pick_weather_emoji(sailing: bool, rating: int, sky: Optional[str],
                        waves: Optional[Tuple[float,float]], wind_rng: Optional[Tuple[int,int]],
-                       hazards_text: Optional[str], temp_f: Optional[int], is_non_sailing: bool) -> str:
+                       alerts: Optional[List[dict]], temp_f: Optional[int], is_non_sailing: bool) -> str:
     s = (sky or "").lower()
     # Priority: severe -> high waves -> rain -> windy (bad) -> cloudy -> sunny -> freezing (non-sailing)
-    if is_severe(hazards_text or s):
+    if is_severe(alerts):
         return "❌"
     if waves and max(waves) > 4.0 and sailing:
         return "🌊"
@@ -1,25 +1,191 @@
-import requests, re, sys
-from typing import Optional, List
-from .config import NWS_UA, TGFTP_ROOT, NDBC_REALTIME
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from . import breaker, ratelimit
+from .breaker import CircuitOpen
+from .config import NWS_UA, TGFTP_ROOT, NDBC_REALTIME, ALERTS_ACTIVE, TGFTP_VARIANTS
+
+# Run-wide deadline (time.monotonic() value) set by cli --deadline
+_deadline_at: Optional[float] = None
+# Under a deadline one request may take at most this share of the time left
+# (but never less than MIN_REQUEST_S), so a hung host leaves time for the
+# fallbacks and for other cities.
+REQUEST_SHARE = 0.5
+MIN_REQUEST_S = 2.0
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting a request once the run's time budget is spent."""
+
+
+# Fetch paths treat these as a silent miss and fall back
+_SKIPPED = (CircuitOpen, DeadlineExceeded)
+
+
+# URL -> body of every 200 response while a run snapshot is being recorded
+_captured: Optional[Dict[str, str]] = None
+
+
+def capture_responses(on: bool = True) -> Dict[str, str]:
+    """Start (or stop) recording raw responses for a run snapshot; returns what was recorded."""
+    global _captured
+    got = _captured or {}
+    _captured = {} if on else None
+    return got
+
+
+def captured() -> Dict[str, str]:
+    return dict(_captured or {})
+
+
+# Gridpoint raw data (--grid-data): numeric wind, gusts and waves for grid and Great Lakes cities
+_grid_data = False
+
+
+def use_grid_data(on: bool = True) -> None:
+    global _grid_data
+    _grid_data = on
+
+
+def grid_data_enabled() -> bool:
+    return _grid_data
+
+
+def set_deadline(seconds: Optional[float]) -> None:
+    """Cap every later request at `seconds` from now in total (None clears it)."""
+    global _deadline_at
+    _deadline_at = time.monotonic() + seconds if seconds is not None else None
+
+
+def time_left() -> Optional[float]:
+    return None if _deadline_at is None else _deadline_at - time.monotonic()
+
 
 def http_get(url: str, timeout=20):
-    return requests.get(url, timeout=timeout, headers={"User-Agent": NWS_UA}, allow_redirects=True)
+    # requests is imported here rather than at module level so that CLI paths
+    # that never touch the network (out-of-season exits, --help) start fast.
+    import requests
 
-def fetch_tgftp_text(rel_path: str) -> Optional[str]:
-    """Resilient TGFTP fetch: try with and without trailing slash."""
-    base = f"{TGFTP_ROOT}/{rel_path.lstrip('/')}"
-    try_order = [base, base.rstrip('/'), base.rstrip('/') + '/']
-    seen = set()
-    for url in try_order:
-        if url in seen: continue
-        seen.add(url)
+    left = time_left()
+    clipped = False
+    if left is not None:
+        if left <= 0:
+            raise DeadlineExceeded(f"run deadline reached before {url}")
+        share = max(min(left, MIN_REQUEST_S), left * REQUEST_SHARE)
+        clipped = share < timeout
+        timeout = min(timeout, share)
+    probes = breaker.before_request(url)  # raises CircuitOpen for known-bad hosts/URLs
+    recorded = False
+    try:
+        try:
+            waited = ratelimit.acquire(url, max_wait=left)  # per-host pacing
+        except ratelimit.RateLimited as e:
+            raise DeadlineExceeded(f"run deadline reached queueing for {url}") from e
+        if left is not None:
+            timeout = max(0.1, timeout - waited)
         try:
-            r = http_get(url)
-            if r.status_code == 200 and r.text.strip():
-                return r.text
+            r = requests.get(url, timeout=timeout, headers={"User-Agent": NWS_UA}, allow_redirects=True)
         except Exception as e:
+            if clipped:
+                # our budget cut the request short, not a verdict on the host
+                if (time_left() or 0) <= 0:
+                    raise DeadlineExceeded(f"run deadline reached during {url}") from e
+                raise
+            breaker.record_failure(url)
+            recorded = True
+            raise
+        breaker.record_response(url, r.status_code)
+        recorded = True
+    finally:
+        if not recorded:
+            breaker.release(probes)  # no verdict on the host: let the next caller probe
+    if _captured is not None and r.status_code == 200:
+        _captured[url] = r.text
+    return r
+
+# TGFTP serves a product with or without a trailing slash depending on the
+# mirror; the variant that answered last is remembered per path (on disk, so
+# later runs go straight to it) and the other is only sent as a hedge.
+HEDGE_DELAY_S = 1.5
+_variants: Optional[Dict[str, str]] = None
+_variants_lock = threading.Lock()
+
+
+def _load_variants() -> Dict[str, str]:
+    global _variants
+    if _variants is None:
+        try:
+            with open(TGFTP_VARIANTS, encoding="utf-8") as fh:
+                _variants = json.load(fh)
+        except (OSError, ValueError):
+            _variants = {}
+    return _variants
+
+
+def _remember_variant(rel_path: str, suffix: str) -> None:
+    with _variants_lock:
+        variants = _load_variants()
+        if variants.get(rel_path) == suffix:
+            return
+        variants[rel_path] = suffix
+        try:
+            os.makedirs(os.path.dirname(TGFTP_VARIANTS), exist_ok=True)
+            tmp = f"{TGFTP_VARIANTS}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(variants, fh, sort_keys=True)
+            os.replace(tmp, TGFTP_VARIANTS)
+        except OSError:
+            pass  # remembering is only an optimisation
+
+
+def _fetch_variant(url: str, q: "queue.Queue") -> None:
+    try:
+        r = http_get(url)
+        q.put((url, r.text if r.status_code == 200 and r.text.strip() else None, None))
+    except Exception as e:
+        q.put((url, None, e))
+
+
+def fetch_tgftp_text(rel_path: str) -> Optional[str]:
+    """
+    Hedged TGFTP fetch: try the remembered URL variant (with/without trailing
+    slash) first, send the other if there's no answer after HEDGE_DELAY_S (or
+    right away if the first fails), and take the first good 200. The losing
+    request is abandoned; its thread finishes in the background.
+    """
+    rel_path = rel_path.lstrip('/')
+    base = f"{TGFTP_ROOT}/{rel_path}".rstrip('/')
+    with _variants_lock:
+        first = _load_variants().get(rel_path, "")
+    pending = [base + first, base + ("/" if first == "" else "")]
+    q: "queue.Queue" = queue.Queue()
+    outstanding = 0
+
+    def launch():
+        nonlocal outstanding
+        threading.Thread(target=_fetch_variant, args=(pending.pop(0), q), daemon=True).start()
+        outstanding += 1
+
+    launch()
+    while outstanding:
+        try:
+            url, text, err = q.get(timeout=HEDGE_DELAY_S if pending else None)
+        except queue.Empty:
+            launch()  # no answer yet: hedge with the other variant
+            continue
+        outstanding -= 1
+        if text:
+            _remember_variant(rel_path, url[len(base):])
+            return text
+        if err is not None and not isinstance(err, _SKIPPED):
             short = url.replace(TGFTP_ROOT + '/', '')
-            print(f"[warn] TGFTP fetch failed {short}: {e}", file=sys.stderr)
+            print(f"[warn] TGFTP fetch failed {short}: {err}", file=sys.stderr)
+        if pending:
+            launch()
     return None
 
 def fetch_city_marine_text(zones: List[str]) -> Optional[str]:
@@ -30,18 +196,76 @@ def fetch_city_marine_text(zones: List[str]) -> Optional[str]:
             buf.append(f"\n\n===== {z.upper()} =====\n{t.strip()}\n")
     return "\n".join(buf).strip() if buf else None
 
-def fetch_grid_periods(lat: float, lon: float) -> Optional[List[dict]]:
-    try:
+_points: Dict[Tuple[float, float], dict] = {}
+
+
+def fetch_points(lat: float, lon: float) -> dict:
+    """/points properties (grid cell, forecast URLs, forecastZone); cached for the process."""
+    key = (round(lat, 4), round(lon, 4))
+    props = _points.get(key)
+    if props is None:
         p = http_get(f"https://api.weather.gov/points/{lat},{lon}")
         p.raise_for_status()
-        fc_url = p.json()["properties"]["forecast"]
+        props = _points[key] = p.json()["properties"]
+    return props
+
+def fetch_active_alerts(zones: List[str]) -> Optional[List[dict]]:
+    """Alert features active in any of `zones`, in a single request; None on failure."""
+    try:
+        r = http_get(ALERTS_ACTIVE.format(zones=",".join(zones)), timeout=15)
+        r.raise_for_status()
+        return r.json().get("features") or []
+    except _SKIPPED:
+        return None
+    except Exception as e:
+        print(f"[warn] Alerts fetch failed: {e}", file=sys.stderr)
+        return None
+
+def fetch_grid_periods(lat: float, lon: float) -> Optional[List[dict]]:
+    try:
+        fc_url = fetch_points(lat, lon)["forecast"]
         f = http_get(fc_url)
         f.raise_for_status()
         return f.json()["properties"]["periods"]
+    except _SKIPPED:
+        return None
     except Exception as e:
         print(f"[warn] Gridpoint fetch failed: {e}", file=sys.stderr)
         return None
 
+def fetch_grid_series(lat: float, lon: float) -> Optional[dict]:
+    """Hourly wind/gust/wave/sky arrays from the gridpoint raw data (see gridseries)."""
+    from .gridseries import parse_grid_data
+
+    try:
+        props = fetch_points(lat, lon)
+        r = http_get(props["forecastGridData"])
+        r.raise_for_status()
+        return parse_grid_data(r.json()["properties"], props.get("timeZone"))
+    except _SKIPPED:
+        return None
+    except Exception as e:
+        print(f"[warn] Grid data fetch failed: {e}", file=sys.stderr)
+        return None
+
+def label_day(label: str, today):
+    """(calendar date, today-ish?) a day label refers to, relative to `today`."""
+    import datetime as dt
+
+    label_up = (label or "").strip().upper()
+    if label_up in ("REST OF TODAY", "TODAY"):
+        return today, True
+    if label_up == "TOMORROW":
+        return today + dt.timedelta(days=1), False
+    # Weekday name like "SATURDAY" / "SUNDAY" etc.
+    weekdays = ["MONDAY","TUESDAY","WEDNESDAY","THURSDAY","FRIDAY","SATURDAY","SUNDAY"]
+    if label_up in weekdays:
+        # next date with that weekday (including today if it matches)
+        delta = (weekdays.index(label_up) - today.weekday()) % 7
+        return today + dt.timedelta(days=delta), False
+    # Fallback: assume today
+    return today, True
+
 def grid_pick_day(periods, label: str):
     """
     Pick the most appropriate NWS grid 'forecast' period for a given label.
@@ -57,30 +281,7 @@ def grid_pick_day(periods, label: str):
     if not periods:
         return None
 
-    label_up = (label or "").strip().upper()
-    now = dt.datetime.now().astimezone()
-    today = now.date()
-
-    # Resolve target date from label
-    if label_up in ("REST OF TODAY", "TODAY"):
-        target_date = today
-        todayish = True
-    elif label_up == "TOMORROW":
-        target_date = today + dt.timedelta(days=1)
-        todayish = False
-    else:
-        # Weekday name like "SATURDAY" / "SUNDAY" etc.
-        weekdays = ["MONDAY","TUESDAY","WEDNESDAY","THURSDAY","FRIDAY","SATURDAY","SUNDAY"]
-        if label_up in weekdays:
-            target_wd = weekdays.index(label_up)
-            # find next date with that weekday (including today if it matches)
-            delta = (target_wd - today.weekday()) % 7
-            target_date = today + dt.timedelta(days=delta)
-            todayish = False
-        else:
-            # Fallback: assume today
-            target_date = today
-            todayish = True
+    target_date, todayish = label_day(label, dt.datetime.now().astimezone().date())
 
     # Parse the period dates and filter to the target date
     def _pdate(p):
@@ -111,30 +312,21 @@ def grid_pick_day(periods, label: str):
     # Non-today cases: weekend/weekday labels — return the first for that date
     return same_day[0]
 
-def fetch_ndbc_latest(station: str) -> Optional[dict]:
+def fetch_ndbc_series(station: str) -> Optional[dict]:
+    """Fetch the realtime2 file (~45 days of 10-minute obs) as an ndbc series."""
+    from .ndbc import parse_ndbc_text
+
     try:
-        r = requests.get(NDBC_REALTIME.format(station=station), timeout=15)
+        r = http_get(NDBC_REALTIME.format(station=station), timeout=15)
         r.raise_for_status()
-        lines = [ln.strip() for ln in r.text.splitlines() if ln.strip() and not ln.startswith("#")]
-        if len(lines) < 2: return None
-        header = lines[0].split(); data = lines[1].split()
-        idx = {k:i for i,k in enumerate(header)}
-        def to_int(s): 
-            try: return int(s)
-            except: return None
-        def to_float(s):
-            try: return float(s)
-            except: return None
-        for k in ["YY","MM","DD","hh","mm","WDIR","WSPD"]:
-            if k not in idx: return None
-        YY = 2000 + to_int(data[idx["YY"]]); MM = to_int(data[idx["MM"]]); DD = to_int(data[idx["DD"]])
-        hh = to_int(data[idx["hh"]]); mm = to_int(data[idx["mm"]])
-        if None in (YY,MM,DD,hh,mm): return None
-        wdir = to_int(data[idx["WDIR"]]); wspd_ms = to_float(data[idx["WSPD"]]); wgst_ms = to_float(data[idx.get("GST",-1)]) if "GST" in idx else None
-        ms_to_kt = 1.943844
-        wspd_kt = round(wspd_ms*ms_to_kt,1) if wspd_ms is not None else None
-        wgst_kt = round(wgst_ms*ms_to_kt,1) if wgst_ms is not None else None
-        return {"wdir_deg": wdir, "wspd_kt": wspd_kt, "wgst_kt": wgst_kt}
+        return parse_ndbc_text(r.text, station)
+    except _SKIPPED:
+        return None
     except Exception as e:
         print(f"[warn] NDBC fetch failed: {e}", file=sys.stderr)
-        return None
\ No newline at end of file
+        return None
+
+def fetch_ndbc_latest(station: str) -> Optional[dict]:
+    from .ndbc import latest_reading
+
+    return latest_reading(fetch_ndbc_series(station))
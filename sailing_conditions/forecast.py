@@ -1,11 +1,15 @@
-from typing import Dict, Optional, Tuple
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from .fetchers import (
     fetch_city_marine_text,
     fetch_grid_periods,
+    fetch_grid_series,
+    grid_data_enabled,
     grid_pick_day,
     fetch_tgftp_text,
-    fetch_ndbc_latest,
+    fetch_ndbc_series,
 )
+from .ndbc import daytime_rows, latest_reading, station_stats, divergence_threshold
 from .parsers import (
     parse_wind,
     parse_waves,
@@ -17,6 +21,9 @@ from .parsers import (
 from .emoji import pick_weather_emoji, compose_prefix_emoji
 from .config import CHICAGO_NEARSHORE, NDBC_STATION
 from .cities import CITIES
+from .results import digest, memoised
+from .alerts import alerts_for, apply_alerts, city_zones, load_alerts
+from .gridseries import day_summary, series_version, wants_series
 
 
 def _wind_from_grid(p):
@@ -64,7 +71,24 @@ def _wind_from_grid(p):
     return None
 
 
-def chicago_forecast(label: str) -> Dict:
+def _with_grid_series(grid_series, label, wdir, wrng, waves, sky, source):
+    """
+    Fold the gridpoint raw data for the day into parsed values. Its numbers
+    replace wind parsed from grid prose; marine text keeps its own wind and
+    only gains missing waves. Returns (wdir, wrng, waves, sky, source, gust).
+    """
+    s = day_summary(grid_series, label) if grid_series else None
+    if not s:
+        return wdir, wrng, waves, sky, source, None
+    if source != "marine":
+        wrng = s["wind_kt"] or wrng
+        wdir = _deg_to_compass(s["wdir_deg"]) or wdir
+        sky = sky or s["sky"]
+        source = "grid"
+    return wdir, wrng, waves or s["waves_ft"], sky, source, s["gust_kt"]
+
+
+def chicago_forecast(label: str, alerts: Optional[List[dict]] = None) -> Dict:
     # Build marine text from LMZ files
     full = []
     for rel in CHICAGO_NEARSHORE:
@@ -72,7 +96,28 @@ def chicago_forecast(label: str) -> Dict:
         if t:
             full.append(t)
     marine_text = "\n\n".join(full)
-
+    series = fetch_ndbc_series(NDBC_STATION)
+    meta = CITIES["chicago"]
+    grid_series = fetch_grid_series(meta["lat"], meta["lon"]) if grid_data_enabled() else None
+    return _chicago_cached(label, marine_text, series, alerts, grid_series=grid_series)
+
+
+def _chicago_cached(label: str, marine_text: str, series: Optional[dict], alerts: Optional[List[dict]],
+                    grid_periods: Optional[Callable[[], Optional[list]]] = None,
+                    grid_series: Optional[dict] = None) -> Dict:
+    obs_version = f"{series['time'][-1]}:{len(series['time'])}" if series and len(series["time"]) else "-"
+    versions = [digest(marine_text), obs_version, digest(alerts)]
+    if grid_series:
+        versions.append(series_version(grid_series, label))
+    # a grid fallback depends on inputs not in this key, so only marine results are stored
+    return memoised("chicago", label, versions,
+                    lambda: _chicago_entry(label, marine_text, series, alerts, grid_periods, grid_series),
+                    cacheable_sources=("marine",))
+
+
+def _chicago_entry(label: str, marine_text: str, series: Optional[dict], alerts: Optional[List[dict]] = None,
+                   grid_periods: Optional[Callable[[], Optional[list]]] = None,
+                   grid_series: Optional[dict] = None) -> Dict:
     # Try exact-day extraction; if missing, fall back to the first "today-ish" block
     sec = extract_day_blurb(marine_text, label) if marine_text else None
     if not sec and marine_text:
@@ -82,31 +127,34 @@ def chicago_forecast(label: str) -> Dict:
     wrng = None
     waves = None
     sky = None
-    hazards = sec or None
+    source = None
 
     if sec:
+        source = "marine"
         wdir, wrng = parse_wind(sec)
         waves = parse_waves(sec)
         sky = parse_sky(sec)
     else:
-        periods = fetch_grid_periods(CITIES["chicago"]["lat"], CITIES["chicago"]["lon"])
+        periods = grid_periods() if grid_periods else fetch_grid_periods(CITIES["chicago"]["lat"], CITIES["chicago"]["lon"])
         if periods:
             p = grid_pick_day(periods, label.title())
             if p:
+                source = "grid"
                 wrng = _wind_from_grid(p)
                 wdir = p.get("windDirection")
                 sky = (p.get("shortForecast") or p.get("detailedForecast") or "").lower()
                 waves = None
-                hazards = sky
+    wdir, wrng, waves, sky, source, gust = _with_grid_series(grid_series, label, wdir, wrng, waves, sky, source)
 
-    # Blend CHII2 obs
-    obs = fetch_ndbc_latest(NDBC_STATION)
+    # Blend CHII2 obs; how far the reading may stray from the forecast before
+    # we widen the range comes from the station's recent variability
+    obs = latest_reading(series)
     if obs and obs.get("wspd_kt") is not None:
         comp = _deg_to_compass(obs.get("wdir_deg"))
         if wrng:
             lo, hi = wrng
             mid = int(round(obs["wspd_kt"]))
-            if abs(((lo + hi) // 2) - mid) >= 4:
+            if abs(((lo + hi) // 2) - mid) >= divergence_threshold(station_stats(series)):
                 wrng = (min(lo, mid), max(hi, mid))
         else:
             mid = int(round(obs["wspd_kt"]))
@@ -114,21 +162,45 @@ def chicago_forecast(label: str) -> Dict:
         if not wdir and comp:
             wdir = comp
 
-    rating = compute_rating(wrng, waves, sky)
-    wind_line = _format_wind(wdir, wrng)
+    rating = apply_alerts(compute_rating(wrng, waves, sky), alerts)
+    wind_line = _format_wind(wdir, wrng, gust)
     waves_line = _format_waves(waves)
     sky_line = sky.title() if sky else "—"
-    weather_emoji = pick_weather_emoji(True, rating, sky, waves, wrng, hazards, None, False)
+    weather_emoji = pick_weather_emoji(True, rating, sky, waves, wrng, alerts, None, False)
     prefix = compose_prefix_emoji(True, rating, weather_emoji)
     quick = f"{label.title()}: {rating}/10. Wind {wind_line}, waves {waves_line}, {sky_line}."
-    return _pack("Chicago", label, rating, wind_line, waves_line, sky_line, True, quick, prefix)
+    return _pack("Chicago", label, rating, wind_line, waves_line, sky_line, True, quick, prefix,
+                 key="chicago", wdir=wdir, wrng=wrng, wave_rng=waves, sky_raw=sky, source=source, obs=obs,
+                 alerts=alerts, gust=gust,
+                 obs_rows={"station": series.get("station"), "rows": daytime_rows(series)} if obs else None)
 
 
-def marine_city_forecast(city_key: str, label: str) -> Dict:
+def marine_city_forecast(city_key: str, label: str, alerts: Optional[List[dict]] = None) -> Dict:
     meta = CITIES[city_key]
     marine_text = fetch_city_marine_text(meta.get("marine_zones") or [])
-    wdir = wrng = waves = sky = None
-    hazards = marine_text or None
+    grid_series = None
+    if grid_data_enabled() and wants_series(city_key):
+        grid_series = fetch_grid_series(meta["lat"], meta["lon"])
+    return _marine_cached(city_key, label, marine_text, alerts, grid_series=grid_series)
+
+
+def _marine_cached(city_key: str, label: str, marine_text: Optional[str], alerts: Optional[List[dict]],
+                   grid_periods: Optional[Callable[[], Optional[list]]] = None,
+                   grid_series: Optional[dict] = None) -> Dict:
+    versions = [digest(marine_text), digest(alerts)]
+    if grid_series:
+        versions.append(series_version(grid_series, label))
+    return memoised(city_key, label, versions,
+                    lambda: _marine_entry(city_key, label, marine_text, alerts, grid_periods, grid_series),
+                    cacheable_sources=("marine",))
+
+
+def _marine_entry(city_key: str, label: str, marine_text: Optional[str],
+                  alerts: Optional[List[dict]] = None,
+                  grid_periods: Optional[Callable[[], Optional[list]]] = None,
+                  grid_series: Optional[dict] = None) -> Dict:
+    meta = CITIES[city_key]
+    wdir = wrng = waves = sky = source = None
 
     if marine_text:
         sec = extract_day_blurb(marine_text, label)
@@ -147,54 +219,128 @@ def marine_city_forecast(city_key: str, label: str) -> Dict:
             wdir, wrng = parse_wind(sec)
             waves = parse_waves(sec)
             sky = parse_sky(sec)
-            hazards = sec
+            if wrng is not None or waves is not None or sky is not None:
+                source = "marine"
 
     temp_f = None
     if wrng is None and waves is None and sky is None:
-        periods = fetch_grid_periods(meta["lat"], meta["lon"])
+        periods = grid_periods() if grid_periods else fetch_grid_periods(meta["lat"], meta["lon"])
         if periods:
             p = grid_pick_day(periods, label.title())
             if p:
+                source = "grid"
                 wrng = _wind_from_grid(p)
                 wdir = p.get("windDirection")
                 sky = (p.get("shortForecast") or p.get("detailedForecast") or "").lower()
                 temp_f = p.get("temperature")
                 waves = None
-                hazards = sky
+    wdir, wrng, waves, sky, source, gust = _with_grid_series(grid_series, label, wdir, wrng, waves, sky, source)
 
-    rating = compute_rating(wrng, waves, sky)
-    wind_line = _format_wind(wdir, wrng)
+    rating = apply_alerts(compute_rating(wrng, waves, sky), alerts)
+    wind_line = _format_wind(wdir, wrng, gust)
     waves_line = _format_waves(waves)
     sky_line = sky.title() if sky else "—"
-    weather_emoji = pick_weather_emoji(True, rating, sky, waves, wrng, hazards, temp_f, False)
+    weather_emoji = pick_weather_emoji(True, rating, sky, waves, wrng, alerts, temp_f, False)
     prefix = compose_prefix_emoji(True, rating, weather_emoji)
     quick = f"{label.title()}: {rating}/10. Wind {wind_line}, waves {waves_line}, {sky_line}."
-    return _pack(meta["label"], label, rating, wind_line, waves_line, sky_line, True, quick, prefix)
+    return _pack(meta["label"], label, rating, wind_line, waves_line, sky_line, True, quick, prefix,
+                 key=city_key, wdir=wdir, wrng=wrng, wave_rng=waves, sky_raw=sky, source=source, alerts=alerts,
+                 gust=gust)
 
 
-def grid_city_forecast(city_key: str, label: str) -> Dict:
+def grid_city_forecast(city_key: str, label: str, alerts: Optional[List[dict]] = None) -> Dict:
     meta = CITIES[city_key]
     periods = fetch_grid_periods(meta["lat"], meta["lon"])
-    wdir = wrng = waves = sky = None
+    grid_series = fetch_grid_series(meta["lat"], meta["lon"]) if grid_data_enabled() else None
+    return _grid_cached(city_key, label, periods, alerts, grid_series)
+
+
+def _grid_cached(city_key: str, label: str, periods: Optional[list], alerts: Optional[List[dict]],
+                 grid_series: Optional[dict] = None) -> Dict:
+    versions = [digest(periods), digest(alerts)]
+    if grid_series:
+        versions.append(series_version(grid_series, label))
+    return memoised(city_key, label, versions,
+                    lambda: _grid_entry(city_key, label, periods, alerts, grid_series))
+
+
+def _grid_entry(city_key: str, label: str, periods: Optional[list], alerts: Optional[List[dict]] = None,
+                grid_series: Optional[dict] = None) -> Dict:
+    meta = CITIES[city_key]
+    wdir = wrng = waves = sky = source = None
     temp_f = None
     if periods:
         p = grid_pick_day(periods, label.title())
         if p:
+            source = "grid"
             wrng = _wind_from_grid(p)
             wdir = p.get("windDirection")
             sky = (p.get("shortForecast") or p.get("detailedForecast") or "").lower()
             temp_f = p.get("temperature")
+    wdir, wrng, waves, sky, source, gust = _with_grid_series(grid_series, label, wdir, wrng, waves, sky, source)
 
-    rating = compute_rating(wrng, waves, sky)
-    wind_line = _format_wind(wdir, wrng)
-    waves_line = "—"
+    rating = apply_alerts(compute_rating(wrng, waves, sky), alerts)
+    wind_line = _format_wind(wdir, wrng, gust)
+    waves_line = _format_waves(waves)
     sky_line = sky.title() if sky else "—"
     weather_emoji = pick_weather_emoji(
-        meta["sailing"], rating, sky, None, wrng, sky, temp_f, not meta["sailing"]
+        meta["sailing"], rating, sky, waves, wrng, alerts, temp_f, not meta["sailing"]
     )
     prefix = compose_prefix_emoji(meta["sailing"], rating, weather_emoji)
     quick = f"{label.title()}: {rating}/10. Wind {wind_line}, waves {waves_line}, {sky_line}."
-    return _pack(meta["label"], label, rating, wind_line, waves_line, sky_line, meta["sailing"], quick, prefix)
+    return _pack(meta["label"], label, rating, wind_line, waves_line, sky_line, meta["sailing"], quick, prefix,
+                 key=city_key, wdir=wdir, wrng=wrng, wave_rng=waves, sky_raw=sky, source=source, alerts=alerts,
+                 gust=gust)
+
+
+def iter_entries(keys: List[str], labels: List[str], label_dates: Optional[Dict[str, date]] = None,
+                 today: Optional[date] = None, active_alerts: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Yield the entry for every city in `keys` and day label in `labels`, each as
+    soon as it is built. labels == ["REST OF TODAY", "TODAY"] picks whichever
+    daytime heading the marine product actually has. Entries get an ISO "date"
+    from label_dates (default: today) and the alerts in effect that day;
+    active_alerts is a load_alerts() result, looked up here for all keys at
+    once when not given.
+    """
+    today = today or date.today()
+    label_dates = label_dates or {}
+    if active_alerts is None:
+        active_alerts = load_alerts(keys)
+    for key in keys:
+        zones = city_zones(key)
+        meta = CITIES[key]
+        # Choose concrete "today" label that actually exists for marine products
+        if labels == ["REST OF TODAY", "TODAY"]:
+            if meta["type"] == "marine":
+                mt = fetch_city_marine_text(meta.get("marine_zones") or [])
+                use_label = _pick_present_day_label(mt) if mt else "TODAY"
+            else:
+                use_label = "TODAY"
+            entries_labels = [use_label]
+        else:
+            entries_labels = labels
+
+        for lab in entries_labels:
+            day = label_dates.get(lab, today)
+            alerts = alerts_for(active_alerts, zones, day)
+            if key == "chicago":
+                e = chicago_forecast(lab, alerts)
+            elif meta["type"] == "marine":
+                e = marine_city_forecast(key, lab, alerts)
+            else:
+                e = grid_city_forecast(key, lab, alerts)
+            e["date"] = day.isoformat()
+            yield e
+
+
+def unavailable_entry(city_key: str, label: str) -> Dict:
+    """Placeholder for a city/day that could not be built before the run deadline."""
+    meta = CITIES[city_key]
+    e = _pack(meta["label"], label, None, "—", "—", "—", meta["sailing"],
+              f"{label.title()}: data unavailable.", "⏳", key=city_key)
+    e["unavailable"] = True
+    return e
 
 
 # helpers used by cli.py to decide which "today" label to fetch
@@ -246,7 +392,9 @@ def _deg_to_compass(deg):
     return dirs[i]
 
 
-def _format_wind(wdir, wrng):
+def _format_wind(wdir, wrng, gust=None):
+    if wrng and gust is not None and gust > wrng[1]:
+        return f"{_format_wind(wdir, wrng)}, gusts {gust} kt"
     if wrng and wdir:
         return f"{wdir} {wrng[0]}–{wrng[1]} kt"
     if wrng:
@@ -263,7 +411,17 @@ def _format_waves(waves):
     return f"{lo}–{hi} ft" if abs(hi - lo) > 0.1 else f"{lo} ft"
 
 
-def _pack(city, label, rating, wind, waves, sky, sailing, quick, prefix):
+def _pack(city, label, rating, wind, waves, sky, sailing, quick, prefix,
+          key=None, wdir=None, wrng=None, wave_rng=None, sky_raw=None, source=None, obs=None, alerts=None,
+          gust=None, obs_rows=None):
+    """
+    Build the entry record shared by the formatters, senders and history store.
+    The *_line fields are display strings; wind_kt/gust_kt/waves_ft/sky keep the
+    parsed values (source is "marine", "grid" or None when nothing was found;
+    gust_kt only comes from gridpoint raw data) and alerts the advisories in
+    effect (None when the lookup failed). obs_rows holds the station's recent
+    daytime readings for the history store; it is not part of entry_record().
+    """
     return {
         "city": city,
         "label": label.title(),
@@ -274,4 +432,14 @@ def _pack(city, label, rating, wind, waves, sky, sailing, quick, prefix):
         "sailing": sailing,
         "quick": quick,
         "prefix": prefix,
+        "key": key,
+        "source": source,
+        "wind_dir": wdir,
+        "wind_kt": list(wrng) if wrng else None,
+        "gust_kt": gust,
+        "waves_ft": list(wave_rng) if wave_rng else None,
+        "sky": sky_raw or None,
+        "obs": obs,
+        "obs_rows": obs_rows,
+        "alerts": alerts,
     }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List
+from typing import IO, Iterable, Iterator, List
 
 def format_slack_line_city(prefix_emoji: str, city: str, label: str, rating: int,
                            wind_line: str, waves_line: str, sky_line: str, sailing: bool,
@@ -7,16 +7,20 @@ def format_slack_line_city(prefix_emoji: str, city: str, label: str, rating: int
         return f"{prefix_emoji} {city} — {label}: {rating}/10. Wind {wind_line}, waves {waves_line}, {sky_line}."
     return f"{prefix_emoji} {city} — {label}: {sky_line or '—'}. {suggestion or ''}".rstrip()
 
+def format_slack_line_unavailable(prefix_emoji: str, city: str, label: str) -> str:
+    return f"{prefix_emoji} {city} — {label}: data unavailable."
+
 def build_email_html(entries: List[dict], date_str: str) -> str:
-    def color(r): return "#16a34a" if r>=8 else ("#eab308" if r>=5 else "#dc2626")
+    def color(r): return "#9ca3af" if r is None else ("#16a34a" if r>=8 else ("#eab308" if r>=5 else "#dc2626"))
     rows = []
     for e in entries:
+        rating = "n/a" if e['rating'] is None else f"{e['rating']}/10"
         rows.append(f"""
         <tr>
           <td style="padding:8px 10px;border-bottom:1px solid #e5e7eb;">{e['prefix']} {e['city']}</td>
           <td style="padding:8px 10px;border-bottom:1px solid #e5e7eb;">{e['label']}</td>
           <td style="padding:8px 10px;border-bottom:1px solid #e5e7eb;">
-            <span style="display:inline-block;padding:2px 8px;border-radius:999px;background:{color(e['rating'])};color:#fff;font-weight:700;">{e['rating']}/10</span>
+            <span style="display:inline-block;padding:2px 8px;border-radius:999px;background:{color(e['rating'])};color:#fff;font-weight:700;">{rating}</span>
           </td>
           <td style="padding:8px 10px;border-bottom:1px solid #e5e7eb;">{e['wind_line']}</td>
           <td style="padding:8px 10px;border-bottom:1px solid #e5e7eb;">{e['waves_line']}</td>
@@ -50,4 +54,55 @@ def build_email_html(entries: List[dict], date_str: str) -> str:
       </table>
     </td></tr>
   </table>
-</body></html>"""
\ No newline at end of file
+</body></html>"""
+RECORD_FIELDS = ["key", "city", "date", "label", "rating", "sailing", "source", "wind_dir",
+                 "wind_kt", "gust_kt", "waves_ft", "sky", "alerts", "obs", "prefix", "quick", "lines", "unavailable"]
+CSV_FIELDS = ["key", "city", "date", "label", "rating", "sailing", "source", "wind_dir",
+              "wind_lo", "wind_hi", "gust_kt", "wave_lo", "wave_hi", "sky", "alerts", "prefix", "quick", "unavailable"]
+
+def entry_record(e: dict) -> dict:
+    """The machine-readable view of an entry (stable keys, JSON-able values)."""
+    rec = {k: e.get(k) for k in RECORD_FIELDS}
+    rec["lines"] = {"wind": e.get("wind_line"), "waves": e.get("waves_line"), "sky": e.get("sky_line")}
+    rec["unavailable"] = bool(e.get("unavailable"))
+    return rec
+
+def _csv_row(rec: dict) -> dict:
+    row = {k: rec.get(k) for k in CSV_FIELDS}
+    for name, lo, hi in (("wind_kt", "wind_lo", "wind_hi"), ("waves_ft", "wave_lo", "wave_hi")):
+        v = rec.get(name)
+        row[lo], row[hi] = (v[0], v[1]) if v else (None, None)
+    row["alerts"] = "; ".join(dict.fromkeys(a["event"] for a in rec.get("alerts") or []))
+    return row
+
+def stream_records(entries: Iterable[dict], fmt: str, out: IO[str]) -> Iterator[dict]:
+    """
+    Write each entry to `out` as jsonl, csv or a json array the moment it
+    arrives (flushing as we go), and pass the entry through unchanged.
+    """
+    import json
+
+    if fmt == "csv":
+        import csv
+
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+    elif fmt == "json":
+        out.write("[")
+    first = True
+    try:
+        for e in entries:
+            rec = entry_record(e)
+            if fmt == "csv":
+                writer.writerow(_csv_row(rec))
+            elif fmt == "json":
+                out.write(("\n" if first else ",\n") + json.dumps(rec, ensure_ascii=False))
+            else:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            first = False
+            yield e
+    finally:
+        if fmt == "json":
+            out.write("\n]\n")
+            out.flush()
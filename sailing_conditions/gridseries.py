@@ -0,0 +1,195 @@
+"""
+NWS gridpoint raw data (/gridpoints/{wfo}/{x},{y}, the forecastGridData URL
+from /points) expanded into hourly numeric arrays.
+
+Each layer is a list of {"validTime": "2025-08-15T18:00:00+00:00/PT3H",
+"value": 18.5} intervals in the layer's unit. They are unrolled onto one
+hourly axis, so a series is a dict of parallel stdlib arrays:
+
+    {"start": unix seconds UTC of hour 0, "step": 3600, "tz": "America/Chicago",
+     "wspd_kt": array('f'), "wgst_kt": array('f'), "wdir_deg": array('f'),
+     "wave_ft": array('f'), "sky_pct": array('f'), "digest": "..."}
+
+Hours a layer does not cover are NaN. Each distinct validTime string is
+parsed once for all layers, and values are converted to knots/feet with one
+multiplication, so there is no prose to regex per period. day_summary()
+reduces a series to the numbers an entry needs for one day label.
+"""
+import hashlib
+import json
+import math
+import re
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+NAN = float("nan")
+MAX_HOURS = 16 * 24  # NWS grids run about 7 days out; anything longer is malformed
+DAY_HOURS = (8, 20)  # local hours a sailing day covers
+GREAT_LAKES_ZONES = ("lmz", "lez", "lhz", "lsz", "loz")
+
+# layer -> (series field, {unit: factor to the field's unit})
+LAYERS = {
+    "windSpeed": ("wspd_kt", {"km_h-1": 0.539957, "m_s-1": 1.943844, "kt": 1.0, "mi_h-1": 0.868976}),
+    "windGust": ("wgst_kt", {"km_h-1": 0.539957, "m_s-1": 1.943844, "kt": 1.0, "mi_h-1": 0.868976}),
+    "windDirection": ("wdir_deg", {"degree_(angle)": 1.0}),
+    "waveHeight": ("wave_ft", {"m": 3.28084, "ft": 1.0}),
+    "skyCover": ("sky_pct", {"percent": 1.0}),
+}
+_DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?$")
+
+
+def wants_series(city_key: str) -> bool:
+    """Grid cities and Great Lakes marine cities, the ones whose products lack gusts or waves."""
+    from .cities import CITIES
+
+    meta = CITIES[city_key]
+    if meta["type"] == "grid":
+        return True
+    return any(z.rsplit("/", 1)[-1][:3] in GREAT_LAKES_ZONES for z in meta.get("marine_zones") or [])
+
+
+def _span(valid_time: str) -> Optional[Tuple[int, int]]:
+    """(start hour as unix seconds, length in hours) of an ISO 8601 interval."""
+    try:
+        start, dur = valid_time.split("/", 1)
+        t = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        m = _DURATION_RE.match(dur)
+        if not m:
+            return None
+        d, h, mins = (int(g or 0) for g in m.groups())
+    except ValueError:
+        return None
+    ts = int(t.timestamp()) // 3600 * 3600
+    return ts, max(1, d * 24 + h + (mins + 59) // 60)
+
+
+def parse_grid_data(props: dict, tz: Optional[str] = None) -> Optional[dict]:
+    """Series from a gridpoint's raw "properties"; None when none of the layers are usable."""
+    spans: Dict[str, Optional[Tuple[int, int]]] = {}
+    layers = {}
+    for name, (field, units) in LAYERS.items():
+        layer = props.get(name) or {}
+        values = layer.get("values") or []
+        if not values:
+            continue
+        uom = (layer.get("uom") or "").rsplit(":", 1)[-1]
+        scale = units.get(uom)
+        if scale is None:
+            print(f"[warn] Grid layer {name}: unknown unit {layer.get('uom')!r}", file=sys.stderr)
+            continue
+        rows = []
+        for v in values:
+            vt = v.get("validTime") or ""
+            if vt not in spans:
+                spans[vt] = _span(vt)
+            if spans[vt] and v.get("value") is not None:
+                rows.append((spans[vt], v["value"] * scale))
+        layers[field] = rows
+    if not layers:
+        return None
+
+    ends = [(s[0], s[0] + s[1] * 3600) for s in spans.values() if s]
+    if not ends:
+        return None
+    t0 = min(a for a, _ in ends)
+    n = min(MAX_HOURS, (max(b for _, b in ends) - t0) // 3600)
+    series = {"start": t0, "step": 3600, "tz": tz}
+    for field, _ in LAYERS.values():
+        arr = array("f", [NAN]) * n
+        for (ts, hours), value in layers.get(field, ()):
+            i = (ts - t0) // 3600
+            j = min(n, i + hours)
+            if i < j:
+                arr[i:j] = array("f", [value]) * (j - i)
+        series[field] = arr
+    raw = json.dumps([props.get(name, {}).get("values") for name in LAYERS], sort_keys=True)
+    series["digest"] = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    return series
+
+
+def _tzinfo(name: Optional[str]):
+    if name:
+        try:
+            from zoneinfo import ZoneInfo
+
+            return ZoneInfo(name)
+        except Exception:  # no zoneinfo (3.8) or no tz database
+            pass
+    return datetime.now().astimezone().tzinfo  # same as grid_pick_day
+
+
+def _window(series: dict, label: str, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Array index range of the label's daytime hours in the series' local time."""
+    from .fetchers import label_day
+
+    tz = _tzinfo(series.get("tz"))
+    now = (now or datetime.now(timezone.utc)).astimezone(tz)
+    day, todayish = label_day(label, now.date())
+    start = datetime(day.year, day.month, day.day, DAY_HOURS[0], tzinfo=tz)
+    end = datetime(day.year, day.month, day.day, DAY_HOURS[1], tzinfo=tz)
+    if todayish and start < now < end - timedelta(hours=1):
+        start = now.replace(minute=0, second=0, microsecond=0)
+    i = (int(start.timestamp()) - series["start"]) // series["step"]
+    j = (int(end.timestamp()) - series["start"]) // series["step"]
+    return max(0, i), max(0, j)
+
+
+def _present(arr: array, i: int, j: int):
+    return [v for v in arr[i:j] if not math.isnan(v)]
+
+
+def _half_ft(v: float) -> float:
+    return max(0.5, round(v * 2) / 2)
+
+
+def sky_words(pct: float) -> str:
+    """NWS daytime sky-cover categories."""
+    if pct <= 5:
+        return "sunny"
+    if pct <= 25:
+        return "mostly sunny"
+    if pct <= 50:
+        return "partly sunny"
+    if pct <= 87:
+        return "mostly cloudy"
+    return "cloudy"
+
+
+def day_summary(series: Optional[dict], label: str, now: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Sustained wind range, peak gust, wave range, mean direction and sky for
+    the label's daytime hours: {"wind_kt": (lo, hi), "gust_kt", "waves_ft":
+    (lo, hi), "wdir_deg", "sky"}, each None when its layer has no data.
+    None when the series does not cover the day at all.
+    """
+    if not series:
+        return None
+    i, j = _window(series, label, now)
+    wspd = _present(series["wspd_kt"], i, j)
+    gust = _present(series["wgst_kt"], i, j)
+    wave = _present(series["wave_ft"], i, j)
+    wdir = _present(series["wdir_deg"], i, j)
+    sky = _present(series["sky_pct"], i, j)
+    if not (wspd or gust or wave or sky):
+        return None
+    mean_dir = None
+    if wdir:
+        x = sum(math.sin(math.radians(d)) for d in wdir)
+        y = sum(math.cos(math.radians(d)) for d in wdir)
+        mean_dir = math.degrees(math.atan2(x, y)) % 360
+    return {
+        "wind_kt": (round(min(wspd)), round(max(wspd))) if wspd else None,
+        "gust_kt": round(max(gust)) if gust else None,
+        "waves_ft": (_half_ft(min(wave)), _half_ft(max(wave))) if wave else None,
+        "wdir_deg": mean_dir,
+        "sky": sky_words(sum(sky) / len(sky)) if sky else None,
+    }
+
+
+def series_version(series: Optional[dict], label: str) -> Optional[str]:
+    """Result-store version of a series for one label (the today-ish window moves with the clock)."""
+    if not series:
+        return None
+    return f"{series['digest']}:{_window(series, label)[0]}"
@@ -0,0 +1,201 @@
+"""
+Append-only local history of forecast entries and buoy observations.
+
+SQLite with narrow numeric rows: days are stored as proleptic ordinals and
+wind/wave ranges as REAL columns, with covering indexes for the two query
+shapes we care about (best days per city/month, forecast-vs-observed error).
+
+    python -m sailing_conditions.history best annapolis --month 7 --years 3
+    python -m sailing_conditions.history error
+"""
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from .config import HISTORY_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    city     TEXT    NOT NULL,
+    day      INTEGER NOT NULL,  -- date.toordinal()
+    month    INTEGER NOT NULL,
+    label    TEXT    NOT NULL,
+    run_ts   INTEGER NOT NULL,  -- unix seconds of the run that produced it
+    source   TEXT,
+    wind_dir TEXT,
+    wind_lo  REAL,
+    wind_hi  REAL,
+    wave_lo  REAL,
+    wave_hi  REAL,
+    sky      TEXT,
+    rating   INTEGER
+);
+CREATE INDEX IF NOT EXISTS forecasts_city_month ON forecasts (city, month, day, run_ts);
+CREATE INDEX IF NOT EXISTS forecasts_city_day ON forecasts (city, day, run_ts);
+
+CREATE TABLE IF NOT EXISTS observations (
+    station  TEXT    NOT NULL,
+    city     TEXT,
+    obs_ts   INTEGER NOT NULL,
+    day      INTEGER NOT NULL,
+    wdir_deg INTEGER,
+    wspd_kt  REAL,
+    wgst_kt  REAL,
+    PRIMARY KEY (station, obs_ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_city_day ON observations (city, day);
+"""
+
+
+def open_history(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or HISTORY_DB
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _rng(v, i):
+    return float(v[i]) if v else None
+
+
+def record_entries(conn: sqlite3.Connection, entries: Iterable[dict], run_ts: Optional[int] = None) -> int:
+    """
+    Append one row per entry (entries need "key" and an ISO "date") and the
+    daytime station readings attached to it (obs_rows). Returns the number of
+    forecast rows written.
+    """
+    run_ts = int(run_ts if run_ts is not None else time.time())
+    rows = []
+    for e in entries:
+        if not e.get("key") or not e.get("date") or e.get("unavailable"):
+            continue
+        d = date.fromisoformat(e["date"])
+        rows.append((
+            e["key"], d.toordinal(), d.month, e["label"], run_ts, e.get("source"), e.get("wind_dir"),
+            _rng(e.get("wind_kt"), 0), _rng(e.get("wind_kt"), 1),
+            _rng(e.get("waves_ft"), 0), _rng(e.get("waves_ft"), 1),
+            e.get("sky"), e.get("rating"),
+        ))
+        if e.get("obs_rows"):
+            record_observation_rows(conn, e["obs_rows"], city=e["key"], commit=False)
+    with conn:
+        conn.executemany("INSERT INTO forecasts VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+    return len(rows)
+
+
+def record_observation(conn: sqlite3.Connection, obs: dict, city: Optional[str] = None, commit: bool = True) -> None:
+    """Store a fetch_ndbc_latest() reading; repeated readings of the same timestamp are ignored."""
+    if not obs or not obs.get("station") or not obs.get("time"):
+        return
+    t = datetime.fromisoformat(obs["time"])
+    conn.execute(
+        "INSERT OR IGNORE INTO observations VALUES (?,?,?,?,?,?,?)",
+        (obs["station"], city, int(t.timestamp()), t.astimezone().date().toordinal(),
+         obs.get("wdir_deg"), obs.get("wspd_kt"), obs.get("wgst_kt")),
+    )
+    if commit:
+        conn.commit()
+
+
+def record_observation_rows(conn: sqlite3.Connection, obs_rows: dict, city: Optional[str] = None,
+                            commit: bool = True) -> int:
+    """
+    Store {"station", "rows": ndbc.daytime_rows()}; readings already stored
+    are ignored, so each run fills in whatever the station reported since.
+    """
+    station, rows = obs_rows.get("station"), obs_rows.get("rows") or []
+    if not station:
+        return 0
+    conn.executemany(
+        "INSERT OR IGNORE INTO observations VALUES (?,?,?,?,?,?,?)",
+        [(station, city, int(ts), datetime.fromtimestamp(ts).date().toordinal(), wdir, wspd, wgst)
+         for ts, wdir, wspd, wgst in rows],
+    )
+    if commit:
+        conn.commit()
+    return len(rows)
+
+
+def best_days(conn: sqlite3.Connection, city: str, month: Optional[int] = None,
+              years: Optional[int] = None, limit: int = 10) -> List[dict]:
+    """Highest-rated days for a city, using the latest forecast recorded for each day."""
+    where, params = ["city = ?"], [city]
+    if month:
+        where.append("month = ?")
+        params.append(month)
+    if years:
+        where.append("day >= ?")
+        params.append(date.today().toordinal() - int(365.25 * years))
+    sql = f"""
+        SELECT day, label, rating, wind_dir, wind_lo, wind_hi, wave_lo, wave_hi, sky, MAX(run_ts)
+        FROM forecasts WHERE {' AND '.join(where)}
+        GROUP BY day ORDER BY rating DESC, day DESC LIMIT ?"""
+    out = []
+    for day, label, rating, wdir, wlo, whi, vlo, vhi, sky, _ in conn.execute(sql, params + [limit]):
+        out.append({
+            "date": date.fromordinal(day).isoformat(), "label": label, "rating": rating, "wind_dir": wdir,
+            "wind_kt": [wlo, whi] if wlo is not None else None,
+            "waves_ft": [vlo, vhi] if vlo is not None else None, "sky": sky,
+        })
+    return out
+
+
+def forecast_error(conn: sqlite3.Connection, city: Optional[str] = None) -> List[dict]:
+    """
+    Forecast wind (range midpoint, latest forecast per day) against the mean
+    of the day's observed daytime readings, per city: bias and mean absolute
+    error in kt. Only cities with a station (Chicago's CHII2) have readings.
+    """
+    sql = """
+        WITH f AS (
+            SELECT city, day, (wind_lo + wind_hi) / 2.0 AS fc, MAX(run_ts)
+            FROM forecasts WHERE wind_lo IS NOT NULL {cond} GROUP BY city, day
+        ), o AS (
+            SELECT city, day, AVG(wspd_kt) AS ob
+            FROM observations WHERE wspd_kt IS NOT NULL {cond} GROUP BY city, day
+        )
+        SELECT f.city, COUNT(*), AVG(f.fc - o.ob), AVG(ABS(f.fc - o.ob))
+        FROM f JOIN o ON o.city = f.city AND o.day = f.day
+        GROUP BY f.city ORDER BY f.city"""
+    cond, params = ("AND city = ?", [city, city]) if city else ("", [])
+    return [
+        {"city": c, "days": n, "bias_kt": round(bias, 2), "mae_kt": round(mae, 2)}
+        for c, n, bias, mae in conn.execute(sql.format(cond=cond), params)
+    ]
+
+
+def main(argv=None) -> int:
+    import argparse, json
+
+    ap = argparse.ArgumentParser(description="Query the local sailing-conditions history")
+    ap.add_argument("--db", default=None, help=f"History database (default {HISTORY_DB})")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("best", help="Best sailing days for a city")
+    b.add_argument("city")
+    b.add_argument("--month", type=int)
+    b.add_argument("--years", type=int)
+    b.add_argument("--limit", type=int, default=10)
+    e = sub.add_parser("error", help="Forecast vs observed wind error per city")
+    e.add_argument("city", nargs="?")
+    args = ap.parse_args(argv)
+
+    conn = open_history(args.db)
+    t0 = time.perf_counter()
+    if args.cmd == "best":
+        rows = best_days(conn, args.city, args.month, args.years, args.limit)
+    else:
+        rows = forecast_error(conn, args.city)
+    for r in rows:
+        print(json.dumps(r, ensure_ascii=False))
+    print(f"[info] {len(rows)} rows in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
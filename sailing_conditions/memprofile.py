@@ -0,0 +1,168 @@
+"""
+Memory profiling by pipeline stage (--memprofile).
+
+    sailing-conditions --all-cities --memprofile mem.jsonl
+    sailing-conditions bulk points.csv --memprofile mem.jsonl
+
+tracemalloc snapshots are taken around each stage (build, snapshot,
+deliver, ...). For every stage the report shows the net memory it left
+allocated, the traced peak while it ran, and the top allocation sites by
+net growth. A site is the innermost frame in this package, so memory
+allocated inside json or requests is charged to the fetcher or builder
+line that asked for it; code loaded by lazy imports is one "<imports>"
+site. The report ends with the process's peak resident memory. With a PATH,
+each run also appends one JSON line to that file, and the report shows the
+change from the previous run of the same command, so leaks and bloat show
+up as a trend.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PROFILE_VERSION = 1
+FRAMES = 12  # deep enough to get from json/requests back into our code
+TOP = 8
+
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+_stages: List[dict] = []
+_command = "run"
+
+
+def start(command: str = "run", frames: int = FRAMES) -> None:
+    global _command
+    _command = command
+    _stages.clear()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def _snapshot() -> "tracemalloc.Snapshot":
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def _short(filename: str) -> str:
+    if filename.startswith(_PKG_DIR + os.sep):
+        return os.path.relpath(filename, os.path.dirname(_PKG_DIR))
+    for p in sorted(sys.path, key=len, reverse=True):  # stdlib and site-packages: module-relative
+        if p and filename.startswith(p.rstrip(os.sep) + os.sep):
+            return filename[len(p.rstrip(os.sep)) + 1:]
+    return filename
+
+
+def _site(tb: "tracemalloc.Traceback") -> tuple:
+    """(our innermost frame, the actual allocating frame if elsewhere); module loading is one site."""
+    if any(f.filename.startswith("<frozen importlib") for f in tb):
+        return "<imports>", None
+    inner = tb[-1]  # frames run oldest -> most recent
+    ours = next((f for f in reversed(tb) if f.filename.startswith(_PKG_DIR)), inner)
+    site = f"{_short(ours.filename)}:{ours.lineno}"
+    via = None if ours == inner else f"{_short(inner.filename)}:{inner.lineno}"
+    return site, via
+
+
+@contextmanager
+def stage(name: str, top: int = TOP):
+    """Record allocations made while the block runs; a no-op unless profiling was started."""
+    if not tracemalloc.is_tracing():
+        yield
+        return
+    before = _snapshot()
+    if hasattr(tracemalloc, "reset_peak"):  # 3.9+
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        after = _snapshot()
+        sites: Dict[tuple, list] = {}
+        for d in after.compare_to(before, "traceback"):
+            if d.size_diff or d.count_diff:
+                acc = sites.setdefault(_site(d.traceback), [0, 0])
+                acc[0] += d.size_diff
+                acc[1] += d.count_diff
+        ranked = sorted((kv for kv in sites.items() if kv[1][0] > 0), key=lambda kv: -kv[1][0])[:top]
+        _stages.append({
+            "name": name,
+            "seconds": round(elapsed, 3),
+            "net_kb": round(sum(v[0] for v in sites.values()) / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [{"site": site, "via": via, "kb": round(size / 1024, 1), "blocks": count}
+                    for (site, via), (size, count) in ranked],
+        })
+        del before, after
+
+
+def peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KB elsewhere
+
+
+def _previous(path: str) -> Optional[dict]:
+    last = None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for ln in fh:
+                try:
+                    doc = json.loads(ln)
+                except ValueError:
+                    continue
+                if doc.get("version") == PROFILE_VERSION and doc.get("command") == _command:
+                    last = doc
+    except OSError:
+        pass
+    return last
+
+
+def _delta(new: float, old: Optional[float]) -> str:
+    return "" if old is None else f" ({new - old:+.0f})"
+
+
+def report(path: Optional[str] = None) -> Optional[dict]:
+    """Print the per-stage report on stderr; with path, append it as a JSON line and compare with the last one."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, _ = tracemalloc.get_traced_memory()
+    doc = {
+        "version": PROFILE_VERSION, "time": int(time.time()), "command": _command,
+        "python": sys.version.split()[0], "traced_kb": round(current / 1024, 1),
+        "peak_rss_kb": peak_rss_kb(), "stages": list(_stages),
+    }
+    prev = _previous(path) if path else None
+    before = {s["name"]: s for s in prev["stages"]} if prev else {}
+
+    for s in doc["stages"]:
+        old = before.get(s["name"], {})
+        print(f"[mem] {s['name']}: net {s['net_kb']:.0f} KB{_delta(s['net_kb'], old.get('net_kb'))}, "
+              f"peak {s['peak_kb']:.0f} KB{_delta(s['peak_kb'], old.get('peak_kb'))}, {s['seconds']:.2f}s",
+              file=sys.stderr)
+        for t in s["top"]:
+            via = f" (via {t['via']})" if t["via"] else ""
+            print(f"[mem]   {t['kb']:9.1f} KB {t['blocks']:7d} blocks  {t['site']}{via}", file=sys.stderr)
+    rss = doc["peak_rss_kb"]
+    if rss is not None:
+        old_rss = prev.get("peak_rss_kb") if prev else None
+        print(f"[mem] peak RSS {rss / 1024:.1f} MB{_delta(rss / 1024, old_rss / 1024 if old_rss else None)}, "
+              f"still traced {doc['traced_kb']:.0f} KB", file=sys.stderr)
+
+    if path:
+        try:
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(doc, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"[warn] Memory profile not saved: {e}", file=sys.stderr)
+    tracemalloc.stop()
+    return doc
@@ -0,0 +1,315 @@
+"""
+NDBC standard meteorological data (realtime2 and historical stdmet files)
+parsed into typed columns for calibration.
+
+A series is a dict of parallel stdlib arrays, oldest first:
+
+    {"station": "CHII2", "time": array('q') unix seconds UTC,
+     "wdir_deg": array('f'), "wspd_kt": array('f'), "wgst_kt": array('f')}
+
+Missing values ("MM" in realtime2, 99/999 sentinels in historical files) are
+NaN. Fixed-width files (the norm) are sliced with struct and each distinct
+cell string is converted once; anything irregular falls back to splitting
+rows.
+"""
+import calendar
+import gzip
+import math
+import operator
+import struct
+import time
+from array import array
+from typing import Dict, List, Optional
+
+MS_TO_KT = 1.943844
+NAN = float("nan")
+
+# Historical stdmet files mark missing values with all-nines sentinels
+_SENTINEL = {"WDIR": 999.0, "WSPD": 99.0, "GST": 99.0}
+_TIME_COLS = ("MM", "DD", "hh")
+_BLOCK_ROWS = 4096  # rows per struct.unpack call in the fixed-width path
+OBS_DAYS = 7  # days of daytime readings kept with an entry: a weekly run still covers every day
+
+
+def _header(lines: List[str]):
+    """Return (column names, index of first data line) or (None, 0)."""
+    for i, ln in enumerate(lines[:4]):
+        toks = ln.lstrip("#").split()
+        if toks and toks[0] in ("YY", "YYYY"):
+            start = i + 1
+            while start < len(lines) and lines[start].startswith("#"):
+                start += 1  # units row
+            names = ["WDIR" if t == "WD" else t for t in toks]
+            names[0] = "YY"
+            return names, start
+    return None, 0
+
+
+class _Table(dict):
+    """Memo of cell -> value; map(table.__getitem__, col) converts each distinct cell once, on first sight."""
+
+    __slots__ = ("convert",)
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, cell):
+        value = self[cell] = self.convert(cell)
+        return value
+
+
+def _float_table(scale: float, sentinel: Optional[float]) -> _Table:
+    """Raises ValueError on anything but a number or "MM"."""
+
+    def convert(v):
+        if v.strip() in ("MM", b"MM"):
+            return NAN
+        f = float(v)
+        return NAN if (sentinel is not None and f >= sentinel) else f * scale
+
+    return _Table(convert)
+
+
+def _column(cols: dict, name: str, n: int, scale: float = 1.0) -> array:
+    col = cols.get(name)
+    if col is None:
+        return array("f", [NAN]) * n
+    table = _float_table(scale, _SENTINEL.get(name))
+    return array("f", map(table.__getitem__, col))
+
+
+def _fixed_width_columns(body: str, names: List[str]) -> Optional[dict]:
+    """
+    Fast path for the usual printf-formatted files where every row has the
+    same length: field boundaries come from the first row and struct slices
+    the needed fields out of all rows at once. Returns None when the file is
+    not fixed-width, so the caller can fall back to splitting.
+    """
+    first = body.split("\n", 1)[0]
+    toks = first.split()
+    if len(toks) < len(names):
+        return None
+    ends, pos = [], 0
+    for t in toks[:len(names)]:
+        pos = first.index(t, pos) + len(t)
+        ends.append(pos)
+    idx = {k: i for i, k in enumerate(names)}
+
+    def span(lo_col, hi_col):
+        return (ends[lo_col - 1] if lo_col else 0), ends[hi_col]
+
+    fields = [("date", span(0, idx["DD"])), ("hm", span(idx["hh"], idx.get("mm", idx["hh"])))]
+    fields += [(c, span(idx[c], idx[c])) for c in ("WDIR", "WSPD", "GST") if c in idx]
+    fields.sort(key=lambda f: f[1][0])
+    fmt, at = [], 0
+    for _, (lo, hi) in fields:
+        if lo < at:
+            return None
+        fmt.append(f"{lo - at}x{hi - lo}s" if lo > at else f"{hi - lo}s")
+        at = hi
+    reclen = len(first) + 1
+    if reclen > at:
+        fmt.append(f"{reclen - at}x")
+
+    raw = body.encode("ascii", "replace")
+    if not raw.endswith(b"\n"):
+        raw += b"\n"
+    nrows, rem = divmod(len(raw), reclen)
+    if rem or raw[reclen - 1::reclen] != b"\n" * nrows:
+        return None
+    # Unpack blocks of rows with one repeated format: each block is a flat
+    # tuple, and a column is a strided slice of it (no per-row tuples)
+    k, unit = len(fields), "".join(fmt)
+    cols: List[list] = [[] for _ in fields]
+    block = min(nrows, _BLOCK_ROWS)
+    full = nrows - nrows % block
+    view = memoryview(raw)
+    for flat in struct.Struct(unit * block).iter_unpack(view[:full * reclen]):
+        for i, col in enumerate(cols):
+            col.extend(flat[i::k])
+    if nrows > full:
+        flat = struct.unpack(unit * (nrows - full), view[full * reclen:])
+        for i, col in enumerate(cols):
+            col.extend(flat[i::k])
+    return {name: col for (name, _), col in zip(fields, cols)}
+
+
+def _split_columns(lines: List[str], names: List[str]) -> Optional[dict]:
+    idx = {k: i for i, k in enumerate(names)}
+    k = max(idx.get(c, 0) for c in ("mm", "hh", "WDIR", "WSPD", "GST")) + 1
+    rows = [r for r in (ln.split(None, k) for ln in lines) if len(r) >= k and not r[0].startswith("#")]
+    if not rows:
+        return None
+    cols = list(zip(*rows))
+    out = {
+        "date": [" ".join(v) for v in zip(*(cols[idx[c]] for c in ("YY", "MM", "DD")))],
+        "hm": [" ".join(v) for v in zip(cols[idx["hh"]], cols[idx["mm"]] if "mm" in idx else ("0",) * len(rows))],
+    }
+    out.update({c: cols[idx[c]] for c in ("WDIR", "WSPD", "GST") if c in idx})
+    return out
+
+
+def parse_ndbc_text(text: str, station: Optional[str] = None) -> Optional[dict]:
+    """Parse a realtime2 or historical stdmet file into a series dict (None if unrecognised)."""
+    text = text or ""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    head = text.split("\n", 4)
+    names, start = _header(head[:4])
+    if not names or not all(c in names for c in _TIME_COLS):
+        return None
+    body = text.split("\n", start)[-1] if start else text
+
+    if body.strip():
+        try:
+            cols = _fixed_width_columns(body, names)
+            if cols:
+                return _series(cols, station)
+        except (ValueError, KeyError, struct.error):
+            pass  # irregular file: fall back to splitting rows
+        cols = _split_columns(body.splitlines(), names)
+        if cols:
+            return _series(cols, station)
+    return {"station": station, "time": array("q"), "wdir_deg": array("f"),
+            "wspd_kt": array("f"), "wgst_kt": array("f")}
+
+
+def _series(cols: dict, station: Optional[str]) -> Optional[dict]:
+    # Time: one timegm() per distinct day plus one conversion per distinct hh:mm
+    def day_start(v):
+        y, m, d = map(int, v.split())
+        y = y + 2000 if y < 100 else y  # two-digit years in older files
+        return calendar.timegm((y, m, d, 0, 0, 0))
+
+    def clock(v):
+        parts = v.split()
+        return int(parts[0]) * 3600 + (int(parts[1]) * 60 if len(parts) > 1 else 0)
+
+    days, hm = _Table(day_start), _Table(clock)
+    t = array("q", map(operator.add, map(days.__getitem__, cols["date"]), map(hm.__getitem__, cols["hm"])))
+
+    n = len(t)
+    series = {
+        "station": station,
+        "time": t,
+        "wdir_deg": _column(cols, "WDIR", n),
+        "wspd_kt": _column(cols, "WSPD", n, MS_TO_KT),
+        "wgst_kt": _column(cols, "GST", n, MS_TO_KT),
+    }
+    # realtime2 is newest-first; historical files are oldest-first
+    if n > 1 and t[0] > t[-1]:
+        for c in ("time", "wdir_deg", "wspd_kt", "wgst_kt"):
+            series[c].reverse()
+    return series
+
+
+def load_ndbc_file(path: str, station: Optional[str] = None) -> Optional[dict]:
+    """Read a (possibly gzipped) realtime2 / stdmet file from disk."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="ascii", errors="replace") as fh:
+        return parse_ndbc_text(fh.read(), station)
+
+
+def latest_reading(series: Optional[dict]) -> Optional[dict]:
+    """Newest row in the shape returned by fetchers.fetch_ndbc_latest()."""
+    if not series or not len(series["time"]):
+        return None
+    from datetime import datetime, timezone
+
+    def _v(x, nd=1):
+        return None if math.isnan(x) else round(x, nd)
+
+    wdir = series["wdir_deg"][-1]
+    return {
+        "station": series.get("station"),
+        "time": datetime.fromtimestamp(series["time"][-1], tz=timezone.utc).isoformat(),
+        "wdir_deg": None if math.isnan(wdir) else int(wdir),
+        "wspd_kt": _v(series["wspd_kt"][-1]),
+        "wgst_kt": _v(series["wgst_kt"][-1]),
+    }
+
+
+def daytime_rows(series: Optional[dict], days: int = OBS_DAYS, now: Optional[float] = None) -> List[list]:
+    """
+    [unix seconds, wdir_deg, wspd_kt, wgst_kt] rows (None where missing),
+    oldest first, of the readings with a wind speed inside the sailing-day
+    hours (gridseries.DAY_HOURS, local time) of the last `days` days.
+    """
+    if not series or not len(series["time"]):
+        return []
+    from datetime import datetime, timedelta
+    from .gridseries import DAY_HOURS
+
+    today = datetime.fromtimestamp(now if now is not None else time.time()).date()
+    first = today - timedelta(days=days - 1)
+    cutoff = datetime(first.year, first.month, first.day).timestamp()
+    times, wdir, wspd, wgst = series["time"], series["wdir_deg"], series["wspd_kt"], series["wgst_kt"]
+    i = len(times)
+    while i and times[i - 1] >= cutoff:
+        i -= 1
+    rows = []
+    for j in range(i, len(times)):
+        if math.isnan(wspd[j]) or not DAY_HOURS[0] <= datetime.fromtimestamp(times[j]).hour < DAY_HOURS[1]:
+            continue
+        rows.append([times[j], None if math.isnan(wdir[j]) else int(wdir[j]), round(wspd[j], 1),
+                     None if math.isnan(wgst[j]) else round(wgst[j], 1)])
+    return rows
+
+
+def _percentile(sorted_vals: List[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return round(sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo), 2)
+
+
+def station_stats(series: Optional[dict], days: float = 30.0) -> Optional[dict]:
+    """
+    Rolling statistics over the trailing `days` of a series:
+      mean_kt, gust_p50_kt, gust_p90_kt, diurnal_kt (24 UTC-hour means),
+      spread_kt (mean |wind - diurnal mean for that hour|) and samples.
+    Returns None when there is no usable wind data.
+    """
+    if not series or not len(series["time"]):
+        return None
+    t, wspd, gust = series["time"], series["wspd_kt"], series["wgst_kt"]
+    cutoff = t[-1] - int(days * 86400)
+    first = next((i for i in range(len(t) - 1, -1, -1) if t[i] < cutoff), -1) + 1
+
+    sums, counts = [0.0] * 24, [0] * 24
+    pairs = []
+    for ts, w in zip(t[first:], wspd[first:]):
+        if w == w:  # skip NaN
+            h = (ts // 3600) % 24
+            sums[h] += w
+            counts[h] += 1
+            pairs.append((h, w))
+    if not pairs:
+        return None
+    diurnal = [round(s / c, 2) if c else None for s, c in zip(sums, counts)]
+    spread = sum(abs(w - sums[h] / counts[h]) for h, w in pairs) / len(pairs)
+    gusts = sorted(g for g in gust[first:] if g == g)
+    return {
+        "station": series.get("station"),
+        "samples": len(pairs),
+        "mean_kt": round(sum(w for _, w in pairs) / len(pairs), 2),
+        "gust_p50_kt": _percentile(gusts, 0.5),
+        "gust_p90_kt": _percentile(gusts, 0.9),
+        "diurnal_kt": diurnal,
+        "spread_kt": round(spread, 2),
+    }
+
+
+def divergence_threshold(stats: Optional[dict], default: float = 4.0, min_samples: int = 144) -> float:
+    """
+    How far (kt) an observation may sit from the forecast midpoint before the
+    forecast range is widened to include it: twice the station's typical
+    deviation from its diurnal mean, floored at 2 kt. Falls back to `default`
+    with less than a day of 10-minute data.
+    """
+    if not stats or stats.get("samples", 0) < min_samples:
+        return default
+    return max(2.0, 2.0 * stats["spread_kt"])
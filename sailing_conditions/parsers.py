@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Optional, Tuple
 
 # Wind & direction
@@ -87,6 +88,11 @@ def parse_sky(text: str) -> Optional[str]:
     return m.group(0).lower() if m else None
 
 
+# Bump whenever parsing, compute_rating or entry formatting changes so stored
+# results (see results.py) are recomputed rather than reused.
+RATING_PROFILE_VERSION = 3
+
+
 def compute_rating(wind_kts, waves_ft, sky: Optional[str]) -> int:
     # If we truly have nothing, stay neutral
     if wind_kts is None and waves_ft is None and not sky:
@@ -134,14 +140,74 @@ def normalize_heading(h: str) -> str:
     return _re.sub(r"\s+", " ", (h or "").strip().upper())
 
 
-def extract_day_blurb(full_text: str, day_heading: str):
-    import re as _re
+# Day-section segmentation. A section starts at a line whose first non-blank
+# text is ".<HEADING>[ NIGHT]..." and runs to the next line that looks like any
+# such heading, or the end of the text. This used to be one (?mis) regex with a
+# lazy body and a repeated lookahead, which goes quadratic on long blank or
+# space runs; the scanner below visits each line once and only hands bounded
+# pieces to small regexes, with the same matches (case folding included).
+MAX_SECTION_TEXT = 2_000_000  # chars scanned; longer input is cut at a line end
+_HEADING_WORDS = re.compile(r"(?i)\.?[A-Z][A-Z /-]{2,}")
+_NIGHT_DOTS = re.compile(r"(?i)NIGHT\.{3}")
+_SPACE = re.compile(r"\s")
+_SPACES = re.compile(r"\s*")
+_NEXT_LINE = re.compile(r"\n\s*")  # to the first non-blank char of a later line
+
+
+@lru_cache(maxsize=64)
+def _day_heading_re(dh: str):
+    return re.compile(rf"(?im)^[^\S\n]*(\.?{re.escape(dh)}(?:\s+NIGHT)?\.{{3,}})")
+
+
+def _is_heading_at(txt: str, q: int) -> bool:
+    """Does any ".WORDS[ NIGHT]..." heading start at q?"""
+    m = _HEADING_WORDS.match(txt, q)
+    if not m:
+        return False
+    end = m.end()
+    if txt.startswith("...", end):
+        return True
+    # the word run may be cut short before whitespace + "NIGHT..." (at least 3 chars kept)
+    s = m.start() + (3 if txt[q] != "." else 4)
+    while s <= end:
+        w = _SPACE.search(txt, s, end + 1)
+        if not w:
+            return False
+        t = _SPACES.match(txt, w.start()).end()
+        if _NIGHT_DOTS.match(txt, t):
+            return True
+        s = t
+    return False
+
+
+def _day_blurb_regex(txt: str, dh: str):
+    # reference form of extract_day_blurb (used for an empty heading)
+    pattern = rf"(?mis)^\s*\.?{re.escape(dh)}(?:\s+NIGHT)?\.{{3,}}(.*?)(?=^\s*\.?[A-Z][A-Z /-]{{2,}}(?:\s+NIGHT)?\.{{3,}}|\Z)"
+    m = re.search(pattern, txt)
+    return m.group(0).strip() if m else None
 
+
+def extract_day_blurb(full_text: str, day_heading: str):
     txt = (full_text or "").replace("\r", "")
+    if len(txt) > MAX_SECTION_TEXT:
+        cut = txt.rfind("\n", 0, MAX_SECTION_TEXT)
+        txt = txt[:cut if cut > 0 else MAX_SECTION_TEXT]
     dh = normalize_heading(day_heading)
-    pattern = rf"(?mis)^\s*\.?{_re.escape(dh)}(?:\s+NIGHT)?\.{{3,}}(.*?)(?=^\s*\.?[A-Z][A-Z /-]{{2,}}(?:\s+NIGHT)?\.{{3,}}|\Z)"
-    m = _re.search(pattern, txt)
-    return m.group(0).strip() if m else None
+    if not dh:
+        return _day_blurb_regex(txt, dh)
+    m = _day_heading_re(dh).search(txt)
+    if not m:
+        return None
+    start, pos, end = m.start(1), m.end(1), len(txt)
+    while True:
+        nl = _NEXT_LINE.search(txt, pos)
+        if not nl or nl.end() >= end:
+            break
+        pos = nl.end()
+        if _is_heading_at(txt, pos):
+            end = pos
+            break
+    return txt[start:end].strip()
 
 
 def extract_today_blurb(full_text: str) -> str:
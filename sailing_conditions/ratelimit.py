@@ -0,0 +1,87 @@
+"""
+Process-wide token-bucket rate limiter, one bucket per upstream host.
+
+Callers reserve a slot under a lock and then wait outside it, so threads
+(time.sleep via acquire) and asyncio tasks (await acquire_async) share the
+same buckets and are served first come, first served. Limits come from
+config.RATE_LIMITS; queueing delay per host is kept for stats().
+"""
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from .config import DEFAULT_RATE_LIMIT, RATE_LIMITS
+
+_lock = threading.Lock()
+_buckets: Dict[str, list] = {}  # host -> [tokens, last refill (monotonic)]
+_stats: Dict[str, dict] = {}
+
+
+class RateLimited(Exception):
+    """Raised when the wait for a slot would be longer than the caller allows."""
+
+
+def _reserve(url: str, max_wait: Optional[float]) -> float:
+    host = urlsplit(url).hostname or ""
+    rate, burst = RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+    now = time.monotonic()
+    with _lock:
+        b = _buckets.setdefault(host, [float(burst), now])
+        b[0] = min(float(burst), b[0] + (now - b[1]) * rate)
+        b[1] = now
+        # tokens may go negative: each waiter owns the slot it reserved
+        wait = max(0.0, (1.0 - b[0]) / rate)
+        if max_wait is not None and wait > max_wait:
+            raise RateLimited(f"{host}: next slot in {wait:.1f}s")
+        b[0] -= 1.0
+        st = _stats.setdefault(host, {"requests": 0, "delayed": 0, "wait_s": 0.0, "max_wait_s": 0.0})
+        st["requests"] += 1
+        if wait > 0:
+            st["delayed"] += 1
+            st["wait_s"] += wait
+            st["max_wait_s"] = max(st["max_wait_s"], wait)
+    return wait
+
+
+def acquire(url: str, max_wait: Optional[float] = None) -> float:
+    """Block until the URL's host has a free slot; returns the time waited."""
+    wait = _reserve(url, max_wait)
+    if wait:
+        time.sleep(wait)
+    return wait
+
+
+async def acquire_async(url: str, max_wait: Optional[float] = None) -> float:
+    import asyncio
+
+    wait = _reserve(url, max_wait)
+    if wait:
+        await asyncio.sleep(wait)
+    return wait
+
+
+def stats() -> Dict[str, dict]:
+    """Per-host requests, how many had to queue, and total/mean/max queueing delay."""
+    with _lock:
+        return {
+            host: dict(st, wait_s=round(st["wait_s"], 3), max_wait_s=round(st["max_wait_s"], 3),
+                       mean_wait_s=round(st["wait_s"] / st["requests"], 4) if st["requests"] else 0.0)
+            for host, st in _stats.items()
+        }
+
+
+def report() -> None:
+    """One stderr line per host whose requests had to queue."""
+    for host, st in sorted(stats().items()):
+        if st["delayed"]:
+            print(f"[info] Rate limit {host}: {st['delayed']}/{st['requests']} requests queued, "
+                  f"{st['wait_s']:.1f}s total (mean {st['mean_wait_s']:.2f}s, max {st['max_wait_s']:.2f}s)",
+                  file=sys.stderr)
+
+
+def reset() -> None:
+    with _lock:
+        _buckets.clear()
+        _stats.clear()
@@ -0,0 +1,100 @@
+"""
+Shared store of computed forecast entries.
+
+Entries are memoised under (city, label, day, source versions, rating profile)
+where the source versions are digests of the raw upstream inputs a builder
+consumed. A rerun that sees the same products skips segmentation, parsing,
+obs blending, rating and emoji selection. Older versions for the same
+city/label/day are evicted when a new one is written, and rows for past days
+are pruned. SQLite in WAL mode lets several cron jobs on one host share it.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from .parsers import RATING_PROFILE_VERSION
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    city     TEXT    NOT NULL,
+    label    TEXT    NOT NULL,
+    day      TEXT    NOT NULL,
+    versions TEXT    NOT NULL,
+    profile  INTEGER NOT NULL,
+    created  INTEGER NOT NULL,
+    entry    TEXT    NOT NULL,
+    PRIMARY KEY (city, label, day, versions, profile)
+) WITHOUT ROWID;
+"""
+KEEP_DAYS = 2  # rows for days older than this are pruned
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def configure(path: Optional[str]) -> None:
+    """Open (or with None, close) the process-wide result store."""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            cutoff = (date.today() - timedelta(days=KEEP_DAYS)).isoformat()
+            conn.execute("DELETE FROM entries WHERE day < ?", (cutoff,))
+        _conn = conn
+
+
+def digest(obj) -> Optional[str]:
+    """Stable short digest of a raw input (text or JSON-able); None stays None."""
+    if obj is None:
+        return None
+    raw = obj if isinstance(obj, str) else json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def memoised(city: str, label: str, versions: Iterable[Optional[str]], build: Callable[[], Dict],
+             cacheable_sources=("marine", "grid")) -> Dict:
+    """
+    Return the stored entry for these inputs, or build() it and store it.
+    Nothing is stored when an input is missing (a None version) or when the
+    entry came from a source whose inputs are not all in `versions`.
+    """
+    versions = list(versions)
+    if _conn is None or any(v is None for v in versions):
+        return build()
+    day = date.today().isoformat()  # labels like TODAY are relative to the run date
+    key = (city, label.upper(), day, "|".join(versions), RATING_PROFILE_VERSION)
+    try:
+        with _lock:
+            row = _conn.execute(
+                "SELECT entry FROM entries WHERE city=? AND label=? AND day=? AND versions=? AND profile=?", key
+            ).fetchone()
+        if row:
+            return json.loads(row[0])
+    except sqlite3.Error as e:
+        print(f"[warn] Result store read failed: {e}", file=sys.stderr)
+
+    entry = build()
+    if entry.get("source") not in cacheable_sources:
+        return entry
+    try:
+        with _lock, _conn:
+            _conn.execute("DELETE FROM entries WHERE city=? AND label=? AND day=?", key[:3])
+            _conn.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?)",
+                          key + (int(time.time()), json.dumps(entry, ensure_ascii=False)))
+    except sqlite3.Error as e:
+        print(f"[warn] Result store write failed: {e}", file=sys.stderr)
+    return entry
@@ -2,35 +2,37 @@
 from __future__ import annotations
 import os
 import sys
-import smtplib
-import ssl
-import socket
-import requests
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Iterable, Optional
+
+# requests, smtplib/ssl and email.mime are imported inside the send paths so
+# that importing this module (and the CLI) stays cheap.
+if TYPE_CHECKING:
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
 
 
 # ------------------------------
 # Slack
 # ------------------------------
 
-def post_slack(message: str) -> None:
+def post_slack(message: str, timeout: float = 10) -> None:
     """
     Send a message to Slack using either:
       1) Incoming Webhook URL (SLACK_WEBHOOK_URL), or
       2) Bot token + channel (SLACK_BOT_TOKEN + SLACK_CHANNEL)
 
-    Prints only status/warnings; does NOT echo the message to stdout.
+    Prints only status/warnings, on stderr; does NOT echo the message.
     """
+    import requests
+
     webhook = os.environ.get("SLACK_WEBHOOK_URL")
     if webhook:
         try:
-            r = requests.post(webhook, json={"text": message}, timeout=10)
+            r = requests.post(webhook, json={"text": message}, timeout=timeout)
             if r.status_code >= 300:
                 print(f"[warn] Slack webhook failed: {r.status_code} {r.text}", file=sys.stderr)
             else:
-                print("[info] Slack webhook sent.")
+                print("[info] Slack webhook sent.", file=sys.stderr)
         except Exception as e:
             print(f"[warn] Slack webhook error: {e}", file=sys.stderr)
         return
@@ -46,17 +48,17 @@ def post_slack(message: str) -> None:
                     "Content-Type": "application/json; charset=utf-8",
                 },
                 json={"channel": channel, "text": message},
-                timeout=10,
+                timeout=timeout,
             )
             data = r.json()
             if not data.get("ok"):
                 print(f"[warn] Slack API error: {data}", file=sys.stderr)
             else:
-                print("[info] Slack bot message sent.")
+                print("[info] Slack bot message sent.", file=sys.stderr)
         except Exception as e:
             print(f"[warn] Slack bot error: {e}", file=sys.stderr)
     else:
-        print("[info] No Slack credentials set; skipping Slack send.")
+        print("[info] No Slack credentials set; skipping Slack send.", file=sys.stderr)
 
 
 # ------------------------------
@@ -91,6 +93,9 @@ def _smtp_ready(params: dict[str, Optional[str]]) -> bool:
 
 
 def _build_message(subject: str, html: str, text_fallback: str, sender: str, recipients: Iterable[str]) -> MIMEMultipart:
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
     msg["From"] = sender
@@ -103,7 +108,7 @@ def _build_message(subject: str, html: str, text_fallback: str, sender: str, rec
     return msg
 
 
-def send_email_html(subject: str, html: str, text_fallback: str = "") -> None:
+def send_email_html(subject: str, html: str, text_fallback: str = "", timeout: float = 20) -> None:
     """
     Send a rich HTML email. Uses:
       SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM, EMAIL_TO
@@ -112,38 +117,42 @@ def send_email_html(subject: str, html: str, text_fallback: str = "") -> None:
       - If PORT == 465: implicit SSL
       - If PORT == 587: STARTTLS
       - If SMTP_USER/PASS missing, try anonymous (some relays allow it)
-      - Prints status/warnings only; does NOT echo message body
+      - Prints status/warnings only, on stderr; does NOT echo message body
     """
     params = _smtp_params()
     if not _smtp_ready(params):
-        print("[warn] Email env vars not fully set; skipping email send.")
+        print("[warn] Email env vars not fully set; skipping email send.", file=sys.stderr)
         return
 
     host = params["host"]
     try:
         port = int(params["port"] or "0")
     except ValueError:
-        print("[warn] Invalid SMTP_PORT; skipping email send.")
+        print("[warn] Invalid SMTP_PORT; skipping email send.", file=sys.stderr)
         return
 
     sender = params["from"]
     recipients = _split_addrs(params["to"])
     if not recipients:
-        print("[warn] EMAIL_TO empty; skipping email send.")
+        print("[warn] EMAIL_TO empty; skipping email send.", file=sys.stderr)
         return
 
+    import smtplib
+    import socket
+    import ssl
+
     msg = _build_message(subject, html, text_fallback, sender, recipients)
 
     try:
         if port == 465:
             # Implicit SSL
             context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(host, port, context=context, timeout=20) as s:
+            with smtplib.SMTP_SSL(host, port, context=context, timeout=timeout) as s:
                 _smtp_login_if_needed(s, params)
                 s.sendmail(sender, recipients, msg.as_string())
         else:
             # Assume STARTTLS if 587, otherwise try plain then upgrade if supported
-            with smtplib.SMTP(host, port, timeout=20) as s:
+            with smtplib.SMTP(host, port, timeout=timeout) as s:
                 s.ehlo()
                 try:
                     s.starttls(context=ssl.create_default_context())
@@ -153,7 +162,7 @@ def send_email_html(subject: str, html: str, text_fallback: str = "") -> None:
                     pass
                 _smtp_login_if_needed(s, params)
                 s.sendmail(sender, recipients, msg.as_string())
-        print(f"[info] Email sent to {', '.join(recipients)}.")
+        print(f"[info] Email sent to {', '.join(recipients)}.", file=sys.stderr)
     except (smtplib.SMTPException, socket.gaierror, TimeoutError) as e:
         print(f"[warn] SMTP error: {e}", file=sys.stderr)
     except Exception as e:
@@ -161,6 +170,8 @@ def send_email_html(subject: str, html: str, text_fallback: str = "") -> None:
 
 
 def _smtp_login_if_needed(smtp: smtplib.SMTP, params: dict[str, Optional[str]]) -> None:
+    import smtplib
+
     user = params.get("user")
     pwd = params.get("pass")
     if user and pwd:
@@ -0,0 +1,153 @@
+"""
+Sharded runs: split the selected cities across workers or hosts, then merge.
+
+    sailing-conditions --all-cities --shard 1/3 --shard-dir /shared/shards   # on each of 3 workers
+    sailing-conditions merge --shard-dir /shared/shards --all-delivery
+
+Shard I of N takes every Nth city of the canonical selection starting at I,
+so any worker given the same arguments computes the same split. Each shard
+writes its entries to <shard-dir>/<run-id>/shard-I-of-N.json. `merge` puts
+them back in canonical order, fills in "data unavailable" placeholders for
+shards that never reported, and does the run's single Slack/email send.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from .config import CACHE_DIR
+
+PARTIAL_VERSION = 1
+DEFAULT_SHARD_DIR = os.path.join(CACHE_DIR, "shards")
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard expects I/N, got {spec!r}") from None
+    if not 1 <= i <= n:
+        raise ValueError(f"--shard {spec}: need 1 <= I <= N")
+    return i, n
+
+
+def shard_keys(sel: List[str], i: int, n: int) -> List[str]:
+    return sel[i - 1::n]
+
+
+def default_run_id(today: date, labels: List[str]) -> str:
+    mode = "today" if labels == ["REST OF TODAY", "TODAY"] else "-".join(lab.lower() for lab in labels)
+    return f"{today.isoformat()}-{mode}"
+
+
+def _partial_path(shard_dir: Optional[str], run_id: str, i: int, n: int) -> str:
+    return os.path.join(shard_dir or DEFAULT_SHARD_DIR, run_id, f"shard-{i}-of-{n}.json")
+
+
+def write_partial(shard_dir: Optional[str], run_id: str, shard: Tuple[int, int], sel: List[str],
+                  labels: List[str], label_day: Dict[str, date], today: date, entries: List[dict]) -> str:
+    """Atomically write one shard's entries (plus what merge needs to check and order them)."""
+    i, n = shard
+    path = _partial_path(shard_dir, run_id, i, n)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    doc = {
+        "version": PARTIAL_VERSION, "run_id": run_id, "shard": i, "shards": n,
+        "keys": sel, "labels": labels, "today": today.isoformat(),
+        "label_dates": {lab: d.isoformat() for lab, d in label_day.items()},
+        "written": int(time.time()), "entries": entries,
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def _latest_run(shard_dir: str) -> Optional[str]:
+    runs = [d for d in os.listdir(shard_dir) if os.path.isdir(os.path.join(shard_dir, d))] \
+        if os.path.isdir(shard_dir) else []
+    return max(runs, key=lambda d: os.path.getmtime(os.path.join(shard_dir, d)), default=None)
+
+
+def merge_partials(shard_dir: Optional[str], run_id: str) -> Tuple[List[dict], date]:
+    """
+    All entries of a run in canonical city order, with placeholders for the
+    cities of missing shards. Returns (entries, run date).
+    """
+    from .forecast import unavailable_entry
+
+    run_dir = os.path.join(shard_dir or DEFAULT_SHARD_DIR, run_id)
+    docs = []
+    for fn in sorted(os.listdir(run_dir)):
+        if fn.startswith("shard-") and fn.endswith(".json"):
+            with open(os.path.join(run_dir, fn), encoding="utf-8") as fh:
+                doc = json.load(fh)
+            if doc.get("version") == PARTIAL_VERSION:
+                docs.append(doc)
+    if not docs:
+        raise FileNotFoundError(f"no shard files in {run_dir}")
+    ref = docs[0]
+    n, sel, labels = ref["shards"], ref["keys"], ref["labels"]
+    for doc in docs[1:]:
+        if (doc["shards"], doc["keys"], doc["labels"]) != (n, sel, labels):
+            print(f"[warn] Shard {doc['shard']}/{doc['shards']} was run with different arguments; "
+                  f"merging it anyway.", file=sys.stderr)
+
+    entries = [e for doc in docs for e in doc["entries"]]
+    missing = sorted(set(range(1, n + 1)) - {doc["shard"] for doc in docs})
+    if missing:
+        print(f"[warn] Missing shards {', '.join(f'{i}/{n}' for i in missing)}; "
+              f"their cities are sent as 'data unavailable'.", file=sys.stderr)
+    for i in missing:
+        for key in shard_keys(sel, i, n):
+            for lab in (["TODAY"] if labels == ["REST OF TODAY", "TODAY"] else labels):
+                e = unavailable_entry(key, lab)
+                e["date"] = ref["label_dates"].get(lab, ref["today"])
+                entries.append(e)
+
+    order = {k: i for i, k in enumerate(sel)}
+    entries.sort(key=lambda e: order.get(e["key"], len(order)))
+    return entries, date.fromisoformat(ref["today"])
+
+
+def main(argv=None) -> int:
+    from .cli import _deliver
+
+    ap = argparse.ArgumentParser(prog="sailing-conditions merge",
+                                 description="Combine shard outputs and do the single delivery")
+    ap.add_argument("--shard-dir", default=None, help=f"Directory the shards wrote to (default {DEFAULT_SHARD_DIR})")
+    ap.add_argument("--run-id", default=None, help="Run to merge (default: the most recent)")
+    ap.add_argument("--email", action="store_true", help="Send to Email")
+    ap.add_argument("--slack", action="store_true", help="Send to Slack")
+    ap.add_argument("--all-delivery", action="store_true", help="Send to both Email and Slack")
+    ap.add_argument("--format", choices=["jsonl", "csv", "json"], help="Write merged records to stdout")
+    ap.add_argument("--history", nargs="?", const="", default=None, metavar="DB",
+                    help="Append the merged entries to the history store")
+    ap.add_argument("--deadline", type=float, metavar="SECONDS", help="Time budget for delivery")
+    args = ap.parse_args(argv)
+
+    started = time.monotonic()
+    shard_dir = args.shard_dir or DEFAULT_SHARD_DIR
+    run_id = args.run_id or _latest_run(shard_dir)
+    if not run_id:
+        print(f"[warn] No shard runs under {shard_dir}", file=sys.stderr)
+        return 2
+    try:
+        entries, today = merge_partials(shard_dir, run_id)
+    except (OSError, ValueError) as e:
+        print(f"[warn] Merge failed: {e}", file=sys.stderr)
+        return 2
+    print(f"[info] Merged run {run_id}: {len(entries)} entries", file=sys.stderr)
+    if args.format:
+        from .formatters import stream_records
+
+        entries = list(stream_records(entries, args.format, sys.stdout))
+    _deliver(entries, today, args, started)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+"""
+Compressed, versioned snapshots of a run: the raw upstream responses it
+consumed (URL -> body), the entries with their parsed fields (wind_kt,
+waves_ft, sky, alerts, ...) and the run's selection and day labels.
+
+    sailing-conditions --from-snapshot            # re-render/re-send the latest run
+    sailing-conditions --from-snapshot PATH --slack
+
+Re-rendering from a snapshot touches no upstream, so a failed send can be
+repeated instantly and formatter changes can be timed on their own.
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from .config import CACHE_DIR
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = os.environ.get("SAILING_SNAPSHOT_DIR") or os.path.join(CACHE_DIR, "snapshots")
+KEEP = 20  # most recent snapshots kept in SNAPSHOT_DIR
+
+
+def write_snapshot(entries: List[dict], raw: Dict[str, str], sel: List[str], labels: List[str],
+                   label_day: Dict[str, date], today: date, directory: Optional[str] = None) -> str:
+    directory = directory or SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    doc = {
+        "version": SNAPSHOT_VERSION, "created": int(time.time()), "today": today.isoformat(),
+        "keys": sel, "labels": labels, "label_dates": {lab: d.isoformat() for lab, d in label_day.items()},
+        "raw": raw, "entries": entries,
+    }
+    path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.json.gz")
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+        json.dump(doc, fh, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    for old in _snapshots(directory)[:-KEEP]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def _snapshots(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, fn) for fn in os.listdir(directory) if fn.endswith(".json.gz"))
+
+
+def load_snapshot(path: Optional[str] = None) -> dict:
+    """Load a snapshot file, or the latest one in SNAPSHOT_DIR when path is None/empty."""
+    if not path:
+        found = _snapshots(SNAPSHOT_DIR)
+        if not found:
+            raise FileNotFoundError(f"no snapshots in {SNAPSHOT_DIR}")
+        path = found[-1]
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        doc = json.load(fh)
+    if doc.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: snapshot version {doc.get('version')} (expected {SNAPSHOT_VERSION})")
+    doc["path"] = path
+    print(f"[info] Loaded snapshot {path} ({len(doc['entries'])} entries, {len(doc['raw'])} raw inputs)",
+          file=sys.stderr)
+    return doc
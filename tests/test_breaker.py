@@ -0,0 +1,68 @@
+"""A refused or abandoned request must not keep a host's half-open probe slot."""
+import asyncio
+import sys
+import types
+
+import pytest
+
+from sailing_conditions import breaker, fetchers, ratelimit
+
+HOST_URL = "https://api.weather.gov/points/1,2"
+DEAD_URL = "https://api.weather.gov/gridpoints/XXX/1,1/forecast"
+FAILED_URL = "https://api.weather.gov/points/9,9"
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    breaker.reset()
+    ratelimit.reset()
+    yield
+    breaker.reset()
+    ratelimit.reset()
+
+
+def _half_open_host():
+    """Open api.weather.gov and let its cooldown pass."""
+    for _ in range(breaker.HOST_FAILURES):
+        breaker.record_failure(FAILED_URL)
+    breaker._state["host:api.weather.gov"]["opened_at"] -= breaker.HOST_COOLDOWN_S + 1
+
+
+def test_cached_url_does_not_take_host_probe():
+    breaker.record_failure(DEAD_URL, host_too=False)  # 404: cached longer than the host cooldown
+    _half_open_host()
+    with pytest.raises(breaker.CircuitOpen):
+        breaker.before_request(DEAD_URL)  # the URL is still negatively cached
+    assert breaker.before_request(HOST_URL) == ("host:api.weather.gov",)  # host can still be probed
+
+
+def test_http_get_releases_probe_when_rate_limited(monkeypatch):
+    _half_open_host()
+    monkeypatch.setitem(sys.modules, "requests", types.ModuleType("requests"))
+
+    def refuse(url, max_wait=None):
+        raise ratelimit.RateLimited("no slot")
+
+    monkeypatch.setattr(ratelimit, "acquire", refuse)
+    with pytest.raises(fetchers.DeadlineExceeded):
+        fetchers.http_get(HOST_URL)
+    assert breaker.before_request(HOST_URL) == ("host:api.weather.gov",)
+
+
+def test_cancelled_async_get_releases_probe():
+    from sailing_conditions.aio import _Session
+
+    class Hung:
+        async def get(self, url, **kw):
+            await asyncio.sleep(3600)
+
+    async def run():
+        task = asyncio.ensure_future(_Session(Hung(), 4).get(HOST_URL))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _half_open_host()
+    asyncio.run(run())
+    assert breaker.before_request(HOST_URL) == ("host:api.weather.gov",)
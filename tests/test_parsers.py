@@ -0,0 +1,60 @@
+"""The line scanner in extract_day_blurb() must segment exactly like the reference regex."""
+import random
+
+import pytest
+
+from sailing_conditions.parsers import MAX_SECTION_TEXT, _day_blurb_regex, extract_day_blurb, normalize_heading
+
+PRODUCT = """FZUS51 KOKX 151445
+CWFOKX
+
+.REST OF TODAY...SW winds 10 to 15 kt. Waves 1 to 2 ft.
+.TONIGHT...W winds 5 to 10 kt.
+.SATURDAY...N winds 10 to 20 kt.
+  Waves 2 to 4 ft.
+.SATURDAY NIGHT...N winds 15 kt.
+.SUNDAY...E winds 5 kt.
+
+$$
+"""
+
+
+def _both(txt, label):
+    """Scanner result, after checking it against the reference regex."""
+    got = extract_day_blurb(txt, label)
+    assert got == _day_blurb_regex(txt, normalize_heading(label))
+    return got
+
+
+@pytest.mark.parametrize("txt, label, want", [
+    ("   .TODAY...SW 10 kt.\n.TONIGHT...calm.", "TODAY", ".TODAY...SW 10 kt."),  # indented heading
+    (PRODUCT, "SATURDAY", ".SATURDAY...N winds 10 to 20 kt.\n  Waves 2 to 4 ft."),  # ends at SATURDAY NIGHT
+    (PRODUCT, "SATURDAY NIGHT", ".SATURDAY NIGHT...N winds 15 kt."),
+    (".SATURDAY NIGHT...N 15 kt.\n.SUNDAY...E 5 kt.", "SATURDAY", ".SATURDAY NIGHT...N 15 kt."),  # NIGHT alone
+    (".today...light winds.\n.tonight...calm.", "TODAY", ".today...light winds."),  # lower case
+    ("TODAY...SW 10 kt.\nTONIGHT...calm.", "TODAY", "TODAY...SW 10 kt."),  # no leading dot
+    (".TODAY...SW 10 kt.\n\n\n   \n  .TONIGHT...calm.", "TODAY", ".TODAY...SW 10 kt."),  # blank lines first
+    (PRODUCT, "rest  of today", ".REST OF TODAY...SW winds 10 to 15 kt. Waves 1 to 2 ft."),
+    (PRODUCT, "MONDAY", None),
+])
+def test_headings(txt, label, want):
+    assert _both(txt, label) == want
+
+
+def test_input_cut_at_a_line_end():
+    line = "Y" * 99 + "\n"
+    txt = ".TODAY...start\n" + line * (MAX_SECTION_TEXT // len(line) + 10) + ".TONIGHT...past the cap\n"
+    cut = txt.rfind("\n", 0, MAX_SECTION_TEXT)
+    assert extract_day_blurb(txt, "TODAY") == txt[:cut].strip()
+    assert extract_day_blurb(txt, "TONIGHT") is None
+
+
+def test_matches_reference_regex_on_random_inputs():
+    rnd = random.Random(42)
+    atoms = [".", "...", "....", "TODAY", "today", "REST OF TODAY", "SATURDAY", "NIGHT", "night", " ", "\t",
+             "\n", "\n\n", "\x0b", "\xa0", "/", "-", "AB", "x", "ſATURDAY", "winds 10 kt", "$$"]
+    labels = ["TODAY", "REST OF TODAY", "SATURDAY", "SATURDAY NIGHT", "AB"]
+    for _ in range(3000):
+        txt = "".join(rnd.choice(atoms) for _ in range(rnd.randrange(1, 40)))
+        lab = rnd.choice(labels)
+        assert extract_day_blurb(txt, lab) == _day_blurb_regex(txt, normalize_heading(lab)), (txt, lab)